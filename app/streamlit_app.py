@@ -26,6 +26,14 @@ else:
     IMPORT_ERROR = None
 
 
+# Once per server process; later reruns and sessions reuse the warmed retriever and clients
+@st.cache_resource(show_spinner="Loading vector store and models…")
+def _warm_up() -> dict:
+    from graph.warmup import warm_up
+
+    return warm_up()
+
+
 def _build_input_state(question: str) -> dict:
     return {
         "question": question,
@@ -55,6 +63,12 @@ def main() -> None:
         render_runtime_error("LangGraph app is not available.")
         st.stop()
 
+    try:
+        _warm_up()
+    except Exception as ex:
+        render_runtime_error("Startup failed while loading the vector store or models.", details=str(ex))
+        st.stop()
+
     if "messages" not in st.session_state:
         st.session_state["messages"] = []
 
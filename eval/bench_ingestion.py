@@ -0,0 +1,230 @@
+import argparse
+import hashlib
+import json
+import math
+import platform
+import random
+import re
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import tomllib
+from datetime import datetime
+from pathlib import Path
+from typing import List
+
+from langchain_core.embeddings import Embeddings
+
+from retrival.ingestion import IngestionConfig, ingest
+
+# Offline ingestion benchmark: writes synthetic multi-page PDFs (repeated header/footer lines,
+# hyphenated line breaks, long pages), runs ingest() against a throwaway Chroma directory with a
+# deterministic local embedder and reports per-stage timings, throughput and peak RSS as JSON.
+#
+#   uv run python -m eval.bench_ingestion --pdfs 40 --pages 12 --out bench_ingestion.json
+
+VOCAB = (
+    "heart failure readmission patients discharge cardiology ejection fraction hospital outcomes "
+    "intervention nurse follow-up medication adherence diuretic telemonitoring frailty sleep apnoea "
+    "rehabilitation exercise strain ventricular pharmacist transition randomized controlled trial "
+    "mortality cohort hazard ratio confidence interval baseline prognosis biomarker natriuretic peptide "
+    "comorbidity diabetes hypertension kidney chronic acute decompensated symptoms education"
+).split()
+
+
+# Deterministic bag-of-words hashing embedder; no network, stable across runs
+class StubEmbeddings(Embeddings):
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _embed(self, text: str) -> List[float]:
+        vec = [0.0] * self.dim
+        for word in re.findall(r"\w+", text.lower()):
+            h = int.from_bytes(hashlib.blake2b(word.encode("utf-8"), digest_size=8).digest(), "little")
+            vec[h % self.dim] += 1.0 if (h >> 32) & 1 else -1.0
+        norm = math.sqrt(sum(v * v for v in vec)) or 1.0
+        return [v / norm for v in vec]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self._embed(text)
+
+
+# Minimal text-only PDF writer (Helvetica, one content stream per page); enough for PyMuPDF/pdfplumber
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(path: Path, pages: List[List[str]], font_size: int = 8) -> None:
+    objects: List[bytes] = []
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog = add(b"")  # filled in once the page tree id is known
+    pages_id = add(b"")
+    font = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for lines in pages:
+        ops = [f"BT /F1 {font_size} Tf {font_size + 2} TL 36 770 Td"]
+        ops.extend(f"({_pdf_escape(ln)}) Tj T*" for ln in lines)
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", errors="replace")
+        content = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(
+            add(
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+                b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font, content)
+            )
+        )
+
+    objects[catalog - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = " ".join(f"{i} 0 R" for i in page_ids).encode()
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for i, body in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % i + body + b"\nendobj\n"
+    xref = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    out += b"".join(b"%010d 00000 n \n" % off for off in offsets)
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog, xref)
+    path.write_bytes(bytes(out))
+
+
+def _synthetic_pages(rng: random.Random, doc_no: int, n_pages: int, lines_per_page: int) -> List[List[str]]:
+    header = [f"Journal of Synthetic Cardiology - Volume {doc_no % 7 + 1}", "Preprint - not peer reviewed"]
+    footer = ["Distributed under CC-BY 4.0 for benchmarking only"]
+
+    pages = []
+    for p in range(n_pages):
+        body: List[str] = []
+        carry = ""
+        while len(body) < lines_per_page:
+            words = [rng.choice(VOCAB) for _ in range(rng.randint(14, 20))]
+            line = (carry + " " + " ".join(words)).strip()
+            carry = ""
+            # Hyphenate the last word across the line break every few lines
+            if rng.random() < 0.3:
+                last = rng.choice([w for w in VOCAB if len(w) > 7] or VOCAB)
+                cut = len(last) // 2
+                line = f"{line} {last[:cut]}-"
+                carry = last[cut:]
+            body.append(line)
+            if rng.random() < 0.08:
+                body.append("")
+        pages.append(header + body + footer + [f"{p + 1}"])
+    return pages
+
+
+def build_corpus(root: Path, n_pdfs: int, n_pages: int, lines_per_page: int, seed: int) -> int:
+    root.mkdir(parents=True, exist_ok=True)
+    rng = random.Random(seed)
+    total_pages = 0
+    for i in range(n_pdfs):
+        pages = _synthetic_pages(rng, i, n_pages, lines_per_page)
+        write_pdf(root / f"synthetic_{i:05d}.pdf", pages)
+        total_pages += len(pages)
+    return total_pages
+
+
+def _peak_rss_mb(who: int) -> float:
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(who).ru_maxrss
+    return round(rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def _project_version() -> str:
+    try:
+        with open(Path(__file__).resolve().parents[1] / "pyproject.toml", "rb") as f:
+            return tomllib.load(f)["project"]["version"]
+    except Exception:
+        return "unknown"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline ingestion benchmark with synthetic PDFs and a stub embedder.")
+    parser.add_argument("--pdfs", type=int, default=20)
+    parser.add_argument("--pages", type=int, default=10)
+    parser.add_argument("--lines-per-page", type=int, default=70)
+    parser.add_argument("--workers", type=int, default=1, help="IngestionConfig.extraction_workers")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="keep the temporary working directory")
+    parser.add_argument("--out", type=Path, default=None, help="optional JSON output path")
+    args = parser.parse_args()
+
+    work = Path(tempfile.mkdtemp(prefix="bench_ingestion_"))
+    try:
+        t0 = time.perf_counter()
+        total_pages = build_corpus(work / "data", args.pdfs, args.pages, args.lines_per_page, args.seed)
+        generate_seconds = time.perf_counter() - t0
+
+        cfg = IngestionConfig(
+            dataset_dir=work / "data",
+            persist_directory=work / "chroma",
+            collection_name="bench-ingestion",
+            manifest_path=work / "ingestion_manifest.json",
+            extraction_workers=args.workers,
+            embedding_cache_path=None,
+            page_cache_dir=None,
+            near_dup_index_path=work / "near_dup.sqlite",
+            lexical_index_path=work / "lexical_index.sqlite",
+            vector_index_dir=work / "vectors",
+        )
+
+        t0 = time.perf_counter()
+        manifest = ingest(cfg, embeddings=StubEmbeddings())
+        wall = time.perf_counter() - t0
+
+        chunks = manifest.get("chunk_count", 0) + manifest.get("near_duplicates", {}).get("collapsed_total", 0)
+        results = {
+            "benchmark": "ingestion",
+            "version": _project_version(),
+            "run_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": {
+                "pdfs": args.pdfs,
+                "pages": total_pages,
+                "lines_per_page": args.lines_per_page,
+                "seed": args.seed,
+                "generate_seconds": round(generate_seconds, 3),
+            },
+            "config": {
+                "extraction_workers": cfg.extraction_workers,
+                "splitter": cfg.splitter,
+                "embed_batch_size": cfg.embed_batch_size,
+                "embed_concurrency": cfg.embed_concurrency,
+            },
+            "wall_seconds": round(wall, 3),
+            "pages_per_sec": round(manifest.get("page_docs_count", 0) / wall, 2) if wall else None,
+            "chunks_per_sec": round(chunks / wall, 2) if wall else None,
+            "chunks": chunks,
+            "stored_chunks": manifest.get("chunk_count", 0),
+            "stage_seconds": manifest.get("timings", {}),
+            "peak_rss_mb": {
+                "self": _peak_rss_mb(resource.RUSAGE_SELF),
+                "extraction_workers": _peak_rss_mb(resource.RUSAGE_CHILDREN),
+            },
+            "failures": manifest.get("failures", []),
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+import argparse
+import dataclasses
+import json
+import time
+from pathlib import Path
+
+import tiktoken
+
+from retrival.ingestion import IngestionConfig, _prepare_file, _split_docs
+
+# Compares the single-pass token-offset splitter with the recursive tiktoken splitter on the cleaned
+# pages of ./data. Reports chunks/sec and how many times the tokenizer was called.
+#
+#   uv run python -m eval.bench_splitter --repeat 3
+
+
+class _TokenizerCounter:
+    METHODS = ("encode", "encode_ordinary", "decode_with_offsets", "decode_tokens_bytes")
+
+    def __init__(self):
+        self.calls = 0
+        self._originals = {}
+
+    def __enter__(self):
+        for name in self.METHODS:
+            orig = getattr(tiktoken.Encoding, name)
+            self._originals[name] = orig
+
+            def counted(enc, *args, _orig=orig, **kwargs):
+                self.calls += 1
+                return _orig(enc, *args, **kwargs)
+
+            setattr(tiktoken.Encoding, name, counted)
+        return self
+
+    def __exit__(self, *exc):
+        for name, orig in self._originals.items():
+            setattr(tiktoken.Encoding, name, orig)
+
+
+def _load_pages(cfg: IngestionConfig):
+    pages = []
+    for pdf in sorted(cfg.dataset_dir.rglob("*.pdf")):
+        prepared = _prepare_file(pdf, cfg)
+        pages.extend(prepared.docs)
+    return pages
+
+
+def bench(cfg: IngestionConfig, splitter: str, pages, repeat: int) -> dict:
+    run_cfg = dataclasses.replace(cfg, splitter=splitter)
+    _split_docs(pages[:1], run_cfg)  # load the encoding outside the timed region
+
+    best = None
+    chunks = []
+    calls = 0
+    for _ in range(repeat):
+        with _TokenizerCounter() as counter:
+            t0 = time.perf_counter()
+            chunks = _split_docs(pages, run_cfg)
+            elapsed = time.perf_counter() - t0
+        calls = counter.calls
+        best = elapsed if best is None else min(best, elapsed)
+
+    lengths = [len(c.page_content) for c in chunks]
+    return {
+        "splitter": splitter,
+        "seconds": round(best, 4),
+        "chunks": len(chunks),
+        "chunks_per_sec": round(len(chunks) / best, 1) if best else None,
+        "pages_per_sec": round(len(pages) / best, 1) if best else None,
+        "tokenizer_calls": calls,
+        "tokenizer_calls_per_page": round(calls / max(1, len(pages)), 2),
+        "avg_chunk_chars": round(sum(lengths) / max(1, len(lengths)), 1),
+        "max_chunk_chars": max(lengths, default=0),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the token-offset splitter against the recursive splitter.")
+    parser.add_argument("--dataset-dir", type=Path, default=IngestionConfig.dataset_dir)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--out", type=Path, default=None, help="optional JSON output path")
+    args = parser.parse_args()
+
+    cfg = IngestionConfig(dataset_dir=args.dataset_dir, page_cache_dir=None)
+    pages = _load_pages(cfg)
+
+    results = {
+        "pages": len(pages),
+        "chunk_size_tokens": cfg.chunk_size_tokens,
+        "chunk_overlap_tokens": cfg.chunk_overlap_tokens,
+        "max_chunk_chars": cfg.max_chunk_chars,
+        "runs": [bench(cfg, name, pages, args.repeat) for name in ("recursive", "token")],
+    }
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+from eval.bench_ingestion import _project_version
+
+# Cold-start profile. Each module is imported in a fresh interpreter with `-X importtime`, so the
+# numbers are what a Streamlit worker or a CLI script pays before any warm-up; the heaviest modules
+# are listed by cumulative time. --warm-up also times graph.warmup (needs a store and an API key).
+#
+#   uv run python -m eval.bench_startup
+#   uv run python -m eval.bench_startup --warm-up --out startup.json
+
+DEFAULT_MODULES = ["graph.graph_flow", "retrival.doc_retriver", "retrival.ingestion"]
+
+
+def _import_profile(module: str, top: int) -> Dict:
+    t0 = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    wall = time.perf_counter() - t0
+
+    # stderr lines: "import time: <self us> | <cumulative us> | <indented module name>"
+    rows: List[Dict] = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:") :].split("|")
+        if len(parts) != 3 or not parts[0].strip().isdigit():
+            continue
+        name = parts[2].rstrip()
+        rows.append(
+            {
+                "module": name.strip(),
+                "depth": (len(name) - len(name.lstrip())) // 2,
+                "self_us": int(parts[0]),
+                "cumulative_us": int(parts[1]),
+            }
+        )
+
+    target = next((r for r in reversed(rows) if r["module"] == module), None)
+    heaviest = sorted((r for r in rows if r["module"] != module), key=lambda r: -r["cumulative_us"])[:top]
+    return {
+        "module": module,
+        "ok": proc.returncode == 0,
+        "error": proc.stderr.strip().splitlines()[-1] if proc.returncode else None,
+        "import_ms": round(target["cumulative_us"] / 1000, 2) if target else None,
+        "process_ms": round(wall * 1000, 2),
+        "modules_loaded": len(rows),
+        "streamlit_loaded": any(r["module"] == "streamlit" for r in rows),
+        "heaviest": [
+            {"module": r["module"], "cumulative_ms": round(r["cumulative_us"] / 1000, 2)} for r in heaviest
+        ],
+    }
+
+
+def _warm_up_profile() -> Dict:
+    proc = subprocess.run([sys.executable, "-m", "graph.warmup"], capture_output=True, text=True)
+    if proc.returncode:
+        return {"ok": False, "error": proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else None}
+    return {"ok": True, **json.loads(proc.stdout)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profile cold-start import time.")
+    parser.add_argument("modules", nargs="*", default=DEFAULT_MODULES)
+    parser.add_argument("--top", type=int, default=15, help="heaviest modules to list per import")
+    parser.add_argument("--warm-up", action="store_true", help="also time graph.warmup in a fresh process")
+    parser.add_argument("--out", type=Path, default=None, help="optional JSON output path")
+    args = parser.parse_args()
+
+    results = {
+        "benchmark": "startup",
+        "version": _project_version(),
+        "run_at": datetime.utcnow().isoformat() + "Z",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "imports": [_import_profile(m, args.top) for m in args.modules],
+    }
+    if args.warm_up:
+        results["warm_up"] = _warm_up_profile()
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
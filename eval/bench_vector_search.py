@@ -0,0 +1,172 @@
+import argparse
+import json
+import platform
+import shutil
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List
+
+import chromadb
+import numpy as np
+
+from eval.bench_ingestion import _project_version
+from retrival.vector_index import NumpyVectorIndex, write_vector_index
+
+# Exact in-process search (NumpyVectorIndex) against the Chroma client path. Builds a clustered
+# synthetic collection (or reads an existing one), exports it the way ingest() does and reports
+# recall@k against brute-force float64 ground truth plus p50/p99 latency and startup time as JSON.
+#
+#   uv run python -m eval.bench_vector_search --chunks 20000 --queries 200
+#   uv run python -m eval.bench_vector_search --persist-dir ./retrival/chroma --collection rag-chroma
+
+
+def _synthetic_vectors(rng: np.random.Generator, n: int, dim: int, clusters: int) -> np.ndarray:
+    centers = rng.normal(size=(clusters, dim))
+    vecs = centers[rng.integers(0, clusters, size=n)] + 0.6 * rng.normal(size=(n, dim))
+    return (vecs / np.linalg.norm(vecs, axis=1, keepdims=True)).astype(np.float32)
+
+
+def _build_collection(path: Path, name: str, vectors: np.ndarray, batch: int = 2000):
+    client = chromadb.PersistentClient(path=str(path))
+    col = client.get_or_create_collection(name)
+    for start in range(0, len(vectors), batch):
+        end = min(len(vectors), start + batch)
+        col.add(
+            ids=[f"doc::p0::c{i}" for i in range(start, end)],
+            embeddings=vectors[start:end],
+            documents=[f"synthetic chunk {i}" for i in range(start, end)],
+            metadatas=[{"source": "synthetic.pdf", "page": 0, "chunk_id": i} for i in range(start, end)],
+        )
+    return col
+
+
+def _percentiles(samples: List[float]) -> Dict[str, float]:
+    ms = np.asarray(samples) * 1000
+    return {"p50_ms": round(float(np.percentile(ms, 50)), 3), "p99_ms": round(float(np.percentile(ms, 99)), 3)}
+
+
+def _recall(found: List[List[str]], truth: List[List[str]]) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return round(hits / max(1, sum(len(t) for t in truth)), 4)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark exact NumPy search against Chroma.")
+    parser.add_argument("--chunks", type=int, default=10000)
+    parser.add_argument("--dim", type=int, default=1536)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--batch", type=int, default=5, help="queries per batched call (planner fan-out)")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--persist-dir", type=Path, default=None, help="benchmark an existing Chroma store instead")
+    parser.add_argument("--collection", default="rag-chroma")
+    parser.add_argument("--out", type=Path, default=None, help="optional JSON output path")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(args.seed)
+    work = Path(tempfile.mkdtemp(prefix="bench_vector_search_"))
+    try:
+        t0 = time.perf_counter()
+        if args.persist_dir is None:
+            vectors = _synthetic_vectors(rng, args.chunks, args.dim, args.clusters)
+            col = _build_collection(work / "chroma", "bench-vectors", vectors)
+            chroma_path, name = work / "chroma", "bench-vectors"
+        else:
+            chroma_path, name = args.persist_dir, args.collection
+            col = chromadb.PersistentClient(path=str(chroma_path)).get_collection(name)
+        build_seconds = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        export = write_vector_index(col, work / "vectors")
+        export_seconds = time.perf_counter() - t0
+
+        # Queries: perturbed stored vectors, so every query has a meaningful neighbourhood
+        matrix = np.load(work / "vectors" / "matrix.npy")
+        picks = rng.integers(0, len(matrix), size=args.queries)
+        noise = rng.normal(size=(args.queries, matrix.shape[1])).astype(np.float32) / np.sqrt(matrix.shape[1])
+        queries = matrix[picks] + 0.3 * noise
+        ids_by_row = col.get(limit=len(matrix), include=[])["ids"]
+
+        exact = queries.astype(np.float64) @ matrix.astype(np.float64).T
+        truth = [[ids_by_row[i] for i in np.argsort(-row)[: args.k]] for row in exact]
+        del matrix, exact
+
+        # Startup: cold client/collection open + first query, against loading the memory-mapped export
+        t0 = time.perf_counter()
+        cold = chromadb.PersistentClient(path=str(chroma_path)).get_collection(name)
+        cold.query(query_embeddings=queries[:1], n_results=args.k, include=["documents", "metadatas"])
+        chroma_startup = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        index = NumpyVectorIndex(work / "vectors")
+        index.search_by_vectors(queries[:1], args.k)
+        numpy_startup = time.perf_counter() - t0
+
+        chroma_single, numpy_single = [], []
+        chroma_found, numpy_found = [], []
+        for q in queries:
+            t0 = time.perf_counter()
+            res = cold.query(query_embeddings=q[None, :], n_results=args.k, include=["documents", "metadatas"])
+            chroma_single.append(time.perf_counter() - t0)
+            chroma_found.append(res["ids"][0])
+
+            t0 = time.perf_counter()
+            hits = index.search_by_vectors(q[None, :], args.k)[0]
+            numpy_single.append(time.perf_counter() - t0)
+            numpy_found.append([d.id for d, _ in hits])
+
+        chroma_batch, numpy_batch = [], []
+        for start in range(0, len(queries), args.batch):
+            qs = queries[start : start + args.batch]
+            t0 = time.perf_counter()
+            cold.query(query_embeddings=qs, n_results=args.k, include=["documents", "metadatas"])
+            chroma_batch.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            index.search_by_vectors(qs, args.k)
+            numpy_batch.append(time.perf_counter() - t0)
+
+        results = {
+            "benchmark": "vector_search",
+            "version": _project_version(),
+            "run_at": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "corpus": {
+                "source": "synthetic" if args.persist_dir is None else str(args.persist_dir),
+                "chunks": export["rows"],
+                "dim": export["dim"],
+                "build_seconds": round(build_seconds, 3),
+                "export_seconds": round(export_seconds, 3),
+                "matrix_mb": round((work / "vectors" / "matrix.npy").stat().st_size / 2**20, 1),
+            },
+            "queries": args.queries,
+            "k": args.k,
+            "batch": args.batch,
+            "chroma": {
+                "recall_at_k": _recall(chroma_found, truth),
+                "startup_ms": round(chroma_startup * 1000, 2),
+                "single": _percentiles(chroma_single),
+                "batched": _percentiles(chroma_batch),
+            },
+            "numpy": {
+                "recall_at_k": _recall(numpy_found, truth),
+                "startup_ms": round(numpy_startup * 1000, 2),
+                "single": _percentiles(numpy_single),
+                "batched": _percentiles(numpy_batch),
+            },
+        }
+        index.close()
+    finally:
+        shutil.rmtree(work, ignore_errors=True)
+
+    text = json.dumps(results, indent=2)
+    print(text)
+    if args.out:
+        args.out.write_text(text, encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -88,6 +88,9 @@ def main():
     rows = []
     total = 0
     passed = 0
+    grader_calls = 0
+    kept_docs = 0
+    plan_sources: dict = {}
 
     for line in PROMPTS_PATH.read_text(encoding="utf-8").splitlines():
         if not line.strip():
@@ -100,6 +103,11 @@ def main():
 
         try:
             result = app.invoke({"question": question, "run_id": new_run_id(), "trace": []})
+            research = result.get("research_trace") or {}
+            grader_calls += research.get("grader_calls") or 0
+            kept_docs += research.get("kept") or 0
+            source = (result.get("plan_trace") or {}).get("source", "unknown")
+            plan_sources[source] = plan_sources.get(source, 0) + 1
             errors = validate_output(result, expect_invalid)
             ok = len(errors) == 0
         except Exception as e:
@@ -111,6 +119,8 @@ def main():
             passed += 1
 
     print(f"\nEVAL RESULTS: {passed}/{total} passed\n")
+    print(f"Grader calls: {grader_calls} ({grader_calls / max(1, total):.1f}/prompt), kept documents: {kept_docs}")
+    print(f"Planner sources: {plan_sources}\n")
     for qid, ok, errors in rows:
         status = "PASS" if ok else "FAIL"
         print(f"[{status}] {qid}")
@@ -1,21 +1,29 @@
+import hashlib
 import os
-import streamlit as st
-from dotenv import load_dotenv
-
-load_dotenv()
-
-OPENAI_API_KEY = (
-    os.getenv("OPENAI_API_KEY")
-    or st.secrets.get("OPENAI_API_KEY")
-)
-
-from typing import List
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import RunnableLambda
 
-from langchain_openai import ChatOpenAI
-llm = ChatOpenAI(model="gpt-4o-mini",temperature=0,api_key=OPENAI_API_KEY)
+from graph.utils.evidence import sentence_spans
+from graph.utils.llm import LLM_MODEL, get_llm
+from graph.utils.relevance import looks_instruction_like
+from retrival.lexical_index import tokenize
+from retrival.plan_cache import PlanCache
+
+# Planner output cache: exact match on the normalized question, then (optionally) the most similar cached
+# question by embedding cosine. PLANNER_CACHE_SIMILARITY=none (default) keeps it exact-only.
+PLAN_CACHE_PATH = Path("./retrival/plan_cache.sqlite")
+PLAN_CACHE_MAX_ENTRIES = 5000
+PLAN_CACHE_TTL_SECONDS = 30 * 24 * 3600
+PLANNER_CACHE_SIMILARITY = os.getenv("PLANNER_CACHE_SIMILARITY", "none")
+
+# Fast path: a short single-intent question becomes one retrieval task without a planner call
+PLANNER_FAST_PATH = os.getenv("PLANNER_FAST_PATH", "on").strip().lower() not in ("0", "off", "false", "no")
+FAST_PATH_MAX_WORDS = int(os.getenv("PLANNER_FAST_PATH_MAX_WORDS", "20"))
 
 PLANNER_SYSTEM = """
 You are the Planner Agent for a healthcare enterprise copilot.
@@ -63,4 +71,83 @@ def _to_list(text: str) -> List[str]:
     return tasks
 
 
-planner_agent = planner_prompt | llm | StrOutputParser() | RunnableLambda(_to_list)
+@lru_cache(maxsize=None)
+def get_planner_agent():
+    return planner_prompt | get_llm() | StrOutputParser() | RunnableLambda(_to_list)
+
+
+# Any edit to the planner prompt or a model change starts a fresh set of cached plans
+PLANNER_PROMPT_VERSION = hashlib.sha1(
+    f"{LLM_MODEL}\x00{PLANNER_SYSTEM}\x00{planner_prompt.messages[1].prompt.template}".encode("utf-8")
+).hexdigest()[:12]
+
+
+@lru_cache(maxsize=None)
+def _plan_cache() -> PlanCache:
+    return PlanCache(PLAN_CACHE_PATH, max_entries=PLAN_CACHE_MAX_ENTRIES, ttl_seconds=PLAN_CACHE_TTL_SECONDS)
+
+
+def plan_cache_stats() -> dict:
+    return _plan_cache().stats()
+
+
+#Fast Path
+_RECIPIENT = re.compile(r"(?:\b(?:send|forward|email)\b[^.?!]*?\bto\b\s*)?\brecipient\s*:.*$", re.IGNORECASE | re.DOTALL)
+_EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+# Sentences that only ask for the deliverable's format, not for information
+_DELIVERABLE = re.compile(
+    r"^(?:please\s+)?(?:summari[sz]e|provide|include|give|write|draft|send|create|list|add|format)\b", re.IGNORECASE
+)
+_QUESTION = re.compile(r"^(?:what|which|how|why|when|who|where|is|are|does|do|did|can|should)\b", re.IGNORECASE)
+_MULTI_INTENT = re.compile(r"\?.*\?|;|\b(?:and|or|also)\s+(?:what|how|which|why|when|who|where)\b", re.IGNORECASE)
+
+
+# The one retrieval task for a simple question, or None when it needs the planner: not a plain
+# question, more than one information request, too long, instruction-like, or too little left after
+# the recipient and deliverable-format sentences are removed.
+def fast_path_task(question: str) -> Optional[str]:
+    text = _EMAIL.sub(" ", _RECIPIENT.sub(" ", question or ""))
+    if looks_instruction_like(question or ""):
+        return None
+    sentences = [text[a:b].strip() for a, b in sentence_spans(text)]
+    asks = [s for s in sentences if s and not _DELIVERABLE.match(s)]
+    if len(asks) != 1:
+        return None
+    ask = " ".join(asks[0].split()).rstrip(" ?.!")
+    if not _QUESTION.match(ask) or _MULTI_INTENT.search(asks[0]) or len(ask.split()) > FAST_PATH_MAX_WORDS or len(set(tokenize(ask))) < 2:
+        return None
+    return ask
+
+
+def _similarity_threshold() -> Optional[float]:
+    value = PLANNER_CACHE_SIMILARITY.strip().lower()
+    return None if value in ("", "none", "off") else float(value)
+
+
+# Retrieval tasks for a question plus where they came from: "cache", "fast_path", "cache_similar" or
+# "llm". Only planner LLM output is cached; the fast path is cheaper to recompute than to look up.
+def plan_question(question: str) -> Tuple[List[str], Dict[str, Any]]:
+    cache = _plan_cache()
+    tasks = cache.get(PLANNER_PROMPT_VERSION, question)
+    if tasks:
+        return tasks, {"source": "cache"}
+
+    if PLANNER_FAST_PATH:
+        task = fast_path_task(question)
+        if task:
+            return [task], {"source": "fast_path"}
+
+    vector = None
+    threshold = _similarity_threshold()
+    if threshold is not None:
+        from retrival.doc_retriver import embed_queries
+
+        vector = embed_queries([question])[0]
+        hit = cache.nearest(PLANNER_PROMPT_VERSION, vector, threshold)
+        if hit is not None:
+            tasks, similarity, matched = hit
+            return tasks, {"source": "cache_similar", "similarity": round(similarity, 4), "matched_question": matched}
+
+    tasks = get_planner_agent().invoke({"question": question})
+    cache.put(PLANNER_PROMPT_VERSION, question, tasks, vector=vector)
+    return tasks, {"source": "llm"}
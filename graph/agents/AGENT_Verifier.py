@@ -1,23 +1,10 @@
-import os
-import streamlit as st
-from dotenv import load_dotenv
-
-load_dotenv()
-
-OPENAI_API_KEY = (
-    os.getenv("OPENAI_API_KEY")
-    or st.secrets.get("OPENAI_API_KEY")
-)
-
 from typing import Any, Dict, List
 from langchain_core.documents import Document
 from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
-from langchain_openai import ChatOpenAI
-
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, api_key=OPENAI_API_KEY)
+from graph.utils.llm import get_llm
 
 
 VERIFIER_SYSTEM = """
@@ -142,7 +129,7 @@ def build_verifier_agent():
         ]
     ).partial(format_instructions=parser.get_format_instructions())
 
-    return prompt | llm | parser
+    return prompt | get_llm() | parser
 
 
 def verify_draft(question: str, documents: List[Document], draft: Dict[str, Any]) -> Dict[str, Any]:
@@ -1,14 +1,3 @@
-import os
-import streamlit as st
-from dotenv import load_dotenv
-
-load_dotenv()
-
-OPENAI_API_KEY = (
-    os.getenv("OPENAI_API_KEY")
-    or st.secrets.get("OPENAI_API_KEY")
-)
-
 from typing import Any, Dict, List, Optional
 from datetime import date, timedelta
 
@@ -17,9 +6,8 @@ from langchain_core.output_parsers import JsonOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 from pydantic import BaseModel, Field
 
-from langchain_openai import ChatOpenAI
-
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, api_key=OPENAI_API_KEY)
+from graph.utils.evidence import count_tokens
+from graph.utils.llm import get_llm
 
 
 WRITER_SYSTEM = """
@@ -109,6 +97,11 @@ def _format_docs_for_prompt(docs: List[Document]) -> str:
     return "\n\n".join(parts).strip()
 
 
+# Tokens the evidence block of the writer prompt costs for these documents
+def context_tokens(docs: List[Document]) -> int:
+    return count_tokens(_format_docs_for_prompt(docs))
+
+
 def build_writer_agent():
     parser = JsonOutputParser(pydantic_object=WriterOutput)
 
@@ -119,7 +112,7 @@ def build_writer_agent():
         ]
     ).partial(format_instructions=parser.get_format_instructions())
 
-    return prompt | llm | parser
+    return prompt | get_llm() | parser
 
 
 def write_draft(question: str, documents: List[Document]) -> Dict[str, Any]:
@@ -1,4 +1,5 @@
 PLAN = "planner_node"
 RESEARCH = "research_node"
+COMPRESS = "compress_node"
 VERIFY = "verifier_node"
 WRITE = "writer_node"
\ No newline at end of file
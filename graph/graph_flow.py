@@ -3,8 +3,8 @@ from dotenv import load_dotenv
 from langgraph.graph import StateGraph, END
 
 from graph.state import GraphState
-from graph.consts import PLAN, RESEARCH, VERIFY, WRITE
-from graph.nodes import planner_node, research_node, verifier_node, writer_node
+from graph.consts import COMPRESS, PLAN, RESEARCH, VERIFY, WRITE
+from graph.nodes import compress_node, planner_node, research_node, verifier_node, writer_node
 
 load_dotenv()
 
@@ -13,13 +13,15 @@ workflow = StateGraph(GraphState)
 
 workflow.add_node(PLAN, planner_node)
 workflow.add_node(RESEARCH, research_node)
+workflow.add_node(COMPRESS, compress_node)
 workflow.add_node(WRITE, writer_node)
 workflow.add_node(VERIFY, verifier_node)
 
 
 workflow.set_entry_point(PLAN)
 workflow.add_edge(PLAN, RESEARCH)
-workflow.add_edge(RESEARCH, WRITE)
+workflow.add_edge(RESEARCH, COMPRESS)
+workflow.add_edge(COMPRESS, WRITE)
 workflow.add_edge(WRITE, VERIFY)
 workflow.add_edge(VERIFY, END)
 
@@ -0,0 +1,56 @@
+import os
+from typing import Any, Dict
+
+from graph.agents.AGENT_Writer import context_tokens
+from graph.state import GraphState
+from graph.utils.chunks import load_documents
+from graph.utils.evidence import focus_terms, select_spans
+from graph.utils.tracing import trace_event
+
+NODE = "compress"
+
+# Per kept chunk: at most this many sentences / tokens reach the writer and verifier.
+# EVIDENCE_COMPRESSION=off passes the full chunks through.
+EVIDENCE_COMPRESSION = os.getenv("EVIDENCE_COMPRESSION", "on").strip().lower() not in ("0", "off", "false", "no")
+EVIDENCE_MAX_SENTENCES = int(os.getenv("EVIDENCE_MAX_SENTENCES", "4"))
+EVIDENCE_MAX_TOKENS = int(os.getenv("EVIDENCE_MAX_TOKENS", "200"))
+
+
+def compress_node(state: GraphState) -> Dict[str, Any]:
+    refs = state.get("chunks", []) or []
+    trace_event(state, NODE, "start", {"documents": len(refs), "enabled": EVIDENCE_COMPRESSION})
+
+    try:
+        documents = load_documents(refs, apply_spans=False)
+        evidence = [dict(r) for r in refs]
+        if EVIDENCE_COMPRESSION:
+            # Only char spans go into state; the writer renders them from the chunk store
+            base = focus_terms([state.get("question", ""), *(state.get("plan", []) or [])])
+            for ref, d in zip(evidence, documents):
+                terms = base | focus_terms(ref.get("matched_query") or [])
+                spans = select_spans(d.page_content, terms, EVIDENCE_MAX_SENTENCES, EVIDENCE_MAX_TOKENS)
+                if spans is not None:
+                    ref["spans"] = [list(span) for span in spans]
+
+        tokens_before = context_tokens(documents)
+        tokens_after = context_tokens(load_documents(evidence))
+        compression = {
+            "enabled": EVIDENCE_COMPRESSION,
+            "documents": len(refs),
+            "compressed": sum(1 for r in evidence if r.get("spans")),
+            "tokens_before": tokens_before,
+            "tokens_after": tokens_after,
+            "ratio": round(tokens_after / tokens_before, 3) if tokens_before else None,
+        }
+
+        trace_event(state, NODE, "end", compression)
+
+        return {
+            **state,
+            "evidence": evidence,
+            "compression_trace": compression,
+        }
+
+    except Exception as e:
+        trace_event(state, NODE, "error", {"error": repr(e)})
+        raise
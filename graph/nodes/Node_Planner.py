@@ -1,6 +1,7 @@
+import time
 from typing import Dict, Any
 from graph.state import GraphState
-from graph.agents.AGENT_Planner import planner_agent
+from graph.agents.AGENT_Planner import plan_cache_stats, plan_question
 from graph.utils.tracing import trace_event
 
 NODE = "planner"
@@ -11,14 +12,22 @@ def planner_node(state: GraphState) -> Dict[str, Any]:
 
     try:
         question = state["question"]
-        plan = planner_agent.invoke({"question": question})
+        t0 = time.perf_counter()
+        plan, info = plan_question(question)
+        plan_trace = {**info, "ms": round((time.perf_counter() - t0) * 1000, 1), "cache": plan_cache_stats()}
 
-        trace_event(state, NODE, "end", {"plan_len": len(plan) if isinstance(plan, list) else None})
+        trace_event(
+            state,
+            NODE,
+            "end",
+            {"plan_len": len(plan) if isinstance(plan, list) else None, "source": info["source"], "ms": plan_trace["ms"]},
+        )
 
         return {
             **state,
             "question": question,
             "plan": plan,
+            "plan_trace": plan_trace,
         }
 
     except Exception as e:
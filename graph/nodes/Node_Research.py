@@ -1,6 +1,7 @@
 from typing import Dict, Any
 from graph.state import GraphState
 from graph.agents.AGENT_Research import research_agent
+from graph.utils.chunks import to_refs
 from graph.utils.tracing import trace_event
 
 NODE = "research"
@@ -31,7 +32,7 @@ def research_node(state: GraphState) -> Dict[str, Any]:
         return {
             **state,
             "plan": queries,
-            "documents": documents,
+            "chunks": to_refs(documents),
             "research_trace": trace,
             "document_relevancy": bool(documents),
         }
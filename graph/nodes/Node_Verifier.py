@@ -1,25 +1,22 @@
 from typing import Any, Dict, List
-from graph.state import GraphState
+from graph.state import ChunkRef, GraphState
 from graph.agents.AGENT_Verifier import verify_draft
+from graph.utils.chunks import load_documents
 from graph.utils.tracing import trace_event
-from langchain_core.documents import Document
 
 NODE = "verifier"
 
 
-def _sources_block(documents: List[Document], cited_nums: List[int]) -> str:
+def _sources_block(refs: List[ChunkRef], cited_nums: List[int]) -> str:
     if not cited_nums:
         return "Not found in sources."
-    seen = set()
+    cited = [n for n in dict.fromkeys(cited_nums) if 0 < n <= len(refs)]
+    documents = load_documents(refs, apply_spans=False, only=cited)
     lines: List[str] = ["Sources"]
-    for n in cited_nums:
-        if n in seen:
+    for n in cited:
+        md = documents[n - 1].metadata or {}
+        if not md:
             continue
-        seen.add(n)
-        idx = n - 1
-        if idx < 0 or idx >= len(documents):
-            continue
-        md = documents[idx].metadata or {}
         src = md.get("source", "unknown")
         page = md.get("page_start", md.get("page"))
         chunk = md.get("chunk_id", "?")
@@ -33,16 +30,19 @@ def verifier_node(state: GraphState) -> Dict[str, Any]:
         NODE,
         "start",
         {
-            "documents": len(state.get("documents", []) or []),
+            "documents": len(state.get("chunks", []) or []),
             "has_draft": bool(state.get("writer_draft")),
         },
     )
 
     try:
         question = state["question"]
-        documents = state.get("documents", [])
+        refs = state.get("evidence") or state.get("chunks", []) or []
         draft = state.get("writer_draft", {})
 
+        # Only the cited chunks are fetched; the rest stay as ids
+        documents = load_documents(refs, only=set(draft.get("citations_used", []) or []))
+
         verified = verify_draft(question=question, documents=documents, draft=draft)
 
         if verified.get("invalid"):
@@ -61,7 +61,7 @@ def verifier_node(state: GraphState) -> Dict[str, Any]:
             }
 
         citations_used = verified.get("citations_used", []) or []
-        sources = _sources_block(documents, citations_used)
+        sources = _sources_block(refs, citations_used)
 
         actions = verified.get("actions", []) or []
         conf_counts = {
@@ -1,18 +1,19 @@
 from typing import Any, Dict
 from graph.state import GraphState
 from graph.agents.AGENT_Writer import write_draft
+from graph.utils.chunks import load_documents
 from graph.utils.tracing import trace_event
 
 NODE = "writer"
 
 
 def writer_node(state: GraphState) -> Dict[str, Any]:
-    docs = state.get("documents", []) or []
-    trace_event(state, NODE, "start", {"documents": len(docs)})
+    refs = state.get("evidence") or state.get("chunks", []) or []
+    trace_event(state, NODE, "start", {"documents": len(refs)})
 
     try:
         question = state["question"]
-        documents = state.get("documents", [])
+        documents = load_documents(refs)
 
         draft = write_draft(question=question, documents=documents)
 
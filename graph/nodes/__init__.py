@@ -1,7 +1,8 @@
 from graph.nodes.Node_Planner import planner_node
 from graph.nodes.Node_Research import research_node
+from graph.nodes.Node_Compress import compress_node
 from graph.nodes.Node_Verifier import verifier_node
 from graph.nodes.Node_Writer import writer_node
 
 
-__all__ = ["planner_node","research_node","verifier_node","writer_node"]
\ No newline at end of file
+__all__ = ["planner_node","research_node","compress_node","verifier_node","writer_node"]
\ No newline at end of file
@@ -1,14 +1,30 @@
-from typing import TypedDict, List, Dict, Any
-from langchain_core.documents import Document
+from typing import TypedDict, List, Dict, Any, Optional
+
+
+# A kept chunk by reference: text and metadata are fetched from the chunk store when a node needs them
+class ChunkRef(TypedDict, total=False):
+    id: str
+    score: Optional[float]
+    # True when score is only an upper bound (a BM25-only hit outside the dense candidates)
+    similarity_bound: bool
+    # Every plan query that retrieved the chunk
+    matched_query: List[str]
+    # Set by the compress node: char ranges of the chunk text that reach the writer and verifier
+    spans: List[List[int]]
 
 
 class GraphState(TypedDict, total=False):
     question: str
     plan: List[str]
-    documents: List[Document]
+    plan_trace: Dict[str, Any]
+    chunks: List[ChunkRef]
     document_relevancy: bool
     research_trace: Dict[str, Any]
 
+    # Same chunks and order as `chunks`, trimmed to their relevant sentences, so [n] indexes both lists
+    evidence: List[ChunkRef]
+    compression_trace: Dict[str, Any]
+
     writer_draft: Dict[str, Any]
 
     executive_summary: str
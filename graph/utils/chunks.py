@@ -0,0 +1,56 @@
+import logging
+from typing import Collection, List, Optional
+
+from langchain_core.documents import Document
+
+from graph.state import ChunkRef
+from graph.utils.evidence import render_spans
+from retrival.chunk_store import doc_key
+from retrival.doc_retriver import get_chunk_store
+
+logger = logging.getLogger(__name__)
+
+
+def to_refs(documents: List[Document]) -> List[ChunkRef]:
+    refs: List[ChunkRef] = []
+    for d in documents:
+        md = d.metadata or {}
+        ref: ChunkRef = {"id": d.id or doc_key(d), "score": md.get("similarity")}
+        if md.get("similarity_bound"):
+            ref["similarity_bound"] = True
+        if md.get("matched_query"):
+            ref["matched_query"] = list(md["matched_query"])
+        refs.append(ref)
+    return refs
+
+
+# One Document per ref, in ref order. Positions outside `only` (1-based, like citations) are not fetched,
+# and a chunk missing from the store (re-ingested mid-run) comes back empty; either way [n] positions
+# never shift, and the prompt formatters skip empty chunks.
+def load_documents(
+    refs: List[ChunkRef], apply_spans: bool = True, only: Optional[Collection[int]] = None
+) -> List[Document]:
+    wanted = [r for n, r in enumerate(refs, start=1) if only is None or n in only]
+    found = get_chunk_store().get_many(r["id"] for r in wanted)
+    missing = [r["id"] for r in wanted if r["id"] not in found]
+    if missing:
+        logger.warning(
+            "%d of %d chunk refs are not in the chunk store (lexical index missing or out of sync): %s",
+            len(missing),
+            len(wanted),
+            ", ".join(missing[:5]),
+        )
+    out: List[Document] = []
+    for n, r in enumerate(refs, start=1):
+        doc = found.get(r["id"]) if only is None or n in only else None
+        if doc is None:
+            out.append(Document(page_content="", metadata={}, id=r["id"]))
+            continue
+        md = dict(doc.metadata)
+        md["similarity"] = r.get("score")
+        md["similarity_bound"] = bool(r.get("similarity_bound"))
+        if r.get("matched_query"):
+            md["matched_query"] = list(r["matched_query"])
+        text = render_spans(doc.page_content, r.get("spans")) if apply_spans else doc.page_content
+        out.append(Document(page_content=text, metadata=md, id=r["id"]))
+    return out
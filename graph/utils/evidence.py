@@ -0,0 +1,114 @@
+import re
+from functools import lru_cache
+from typing import Iterable, List, Optional, Set, Tuple
+
+import tiktoken
+
+from retrival.lexical_index import tokenize
+
+# Sentence ends, blank lines, and line breaks that start a list item
+_SENTENCE_BREAK = re.compile(r"(?<=[.!?])\s+(?=[\"'(\[]?[A-Z0-9])|\n\s*\n|\n(?=\s*(?:[-*•]|\d+[.)])\s)")
+_GAP = "..."
+
+Span = Tuple[int, int]
+
+
+@lru_cache(maxsize=None)
+def _encoding():
+    return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str) -> int:
+    return len(_encoding().encode(text, disallowed_special=()))
+
+
+def _trimmed(text: str, start: int, end: int) -> Optional[Span]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return (start, end) if start < end else None
+
+
+# Sentence spans (char offsets); one longer than max_tokens (PDF title/author blocks, tables) is re-cut
+# at line breaks into pieces of about half that size so it cannot take a chunk's whole budget
+def sentence_spans(text: str, max_tokens: int = 0) -> List[Span]:
+    bounds, pos = [], 0
+    for m in _SENTENCE_BREAK.finditer(text):
+        bounds.append((pos, m.start()))
+        pos = m.end()
+    bounds.append((pos, len(text)))
+
+    out: List[Span] = []
+    for start, end in bounds:
+        span = _trimmed(text, start, end)
+        if span is None:
+            continue
+        if max_tokens <= 0 or count_tokens(text[span[0] : span[1]]) <= max_tokens:
+            out.append(span)
+            continue
+        piece_start, size, line_start = span[0], 0, span[0]
+        while line_start < span[1]:
+            nl = text.find("\n", line_start, span[1])
+            line_end = span[1] if nl < 0 else nl + 1
+            cost = count_tokens(text[line_start:line_end])
+            if size and size + cost > max_tokens // 2:
+                out.extend(s for s in [_trimmed(text, piece_start, line_start)] if s)
+                piece_start, size = line_start, 0
+            size += cost
+            line_start = line_end
+        out.extend(s for s in [_trimmed(text, piece_start, span[1])] if s)
+    return out
+
+
+def focus_terms(texts: Iterable[str]) -> Set[str]:
+    terms: Set[str] = set()
+    for t in texts:
+        terms.update(tokenize(t or ""))
+    return terms
+
+
+# Extractive: the sentences sharing the most focus terms, up to max_sentences / max_tokens, in document
+# order. None means "keep the whole chunk" (short chunks); a chunk with no overlapping sentence keeps
+# its opening sentences (it was already graded relevant).
+def select_spans(text: str, terms: Set[str], max_sentences: int, max_tokens: int) -> Optional[List[Span]]:
+    if count_tokens(text) <= max_tokens:
+        return None
+    spans = sentence_spans(text, max_tokens)
+    if len(spans) <= 1:
+        return None
+
+    overlap = [len(terms & set(tokenize(text[a:b]))) for a, b in spans]
+    ranked = sorted(range(len(spans)), key=lambda i: (-overlap[i], i))
+    if overlap[ranked[0]] == 0:
+        ranked = list(range(len(spans)))
+
+    chosen: List[int] = []
+    budget = max_tokens
+    for i in ranked:
+        if len(chosen) >= max_sentences:
+            break
+        if chosen and overlap[i] == 0 and overlap[ranked[0]] > 0:
+            break
+        cost = count_tokens(text[spans[i][0] : spans[i][1]])
+        if chosen and cost > budget:
+            continue
+        chosen.append(i)
+        budget -= cost
+    return [spans[i] for i in sorted(chosen)]
+
+
+# The kept spans joined back together, "..." marking any text that was skipped
+def render_spans(text: str, spans: Optional[List[Span]]) -> str:
+    if not spans:
+        return text.strip()
+    parts: List[str] = []
+    last = 0
+    for start, end in spans:
+        if text[last:start].strip():
+            parts.append(_GAP)
+        parts.append(text[start:end])
+        last = end
+    if text[last:].strip():
+        parts.append(_GAP)
+    return " ".join(parts)
@@ -0,0 +1,13 @@
+from functools import lru_cache
+
+from retrival.settings import openai_api_key
+
+LLM_MODEL = "gpt-4o-mini"
+
+
+# One chat client shared by every agent, built on first use rather than at import
+@lru_cache(maxsize=None)
+def get_llm():
+    from langchain_openai import ChatOpenAI
+
+    return ChatOpenAI(model=LLM_MODEL, temperature=0, api_key=openai_api_key())
@@ -0,0 +1,60 @@
+import re
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+from retrival.lexical_index import tokenize
+
+# Instruction-like chunks are never decided locally; the LLM grader's security rules reject them
+_INSTRUCTION_LIKE = re.compile(
+    r"\b(?:ignore|disregard|override|forget)\b[^.\n]{0,40}\b(?:instructions?|rules?|prompts?|previous|above|sources?|evidence)\b"
+    r"|\byou are now\b|\bsystem prompt\b|\bact as\b|\bnew instructions?\b|\bfabricate\b",
+    re.IGNORECASE,
+)
+
+
+def looks_instruction_like(text: str) -> bool:
+    return bool(_INSTRUCTION_LIKE.search(text))
+
+
+# Local tier bounds. Accept needs both signals high; reject needs both low. Everything in between
+# (and anything without an exact similarity when accepting) goes to the LLM grader.
+@dataclass(frozen=True)
+class TierThresholds:
+    accept_similarity: float = 0.55
+    accept_coverage: float = 0.75
+    reject_similarity: float = 0.25
+    reject_coverage: float = 0.20
+
+
+# Share of the query's content terms that appear in the chunk (same tokenizer as the BM25 index)
+def term_coverage(question: str, text: str) -> float:
+    q_terms = set(tokenize(question))
+    if not q_terms:
+        return 0.0
+    return len(q_terms & set(tokenize(text))) / len(q_terms)
+
+
+# "yes" / "no" when the local signals are confident, None for the uncertain band. similarity is the
+# store's cosine score; when it is only an upper bound it can reject a chunk but never accept one.
+def local_grade(
+    question: str,
+    text: str,
+    similarity: Optional[float],
+    thresholds: TierThresholds,
+    similarity_bound: bool = False,
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    coverage = term_coverage(question, text)
+    signals = {"coverage": round(coverage, 3), "similarity": similarity}
+
+    if looks_instruction_like(text):
+        return None, signals
+    if (
+        similarity is not None
+        and not similarity_bound
+        and similarity >= thresholds.accept_similarity
+        and coverage >= thresholds.accept_coverage
+    ):
+        return "yes", signals
+    if coverage <= thresholds.reject_coverage and (similarity is None or similarity < thresholds.reject_similarity):
+        return "no", signals
+    return None, signals
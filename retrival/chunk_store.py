@@ -0,0 +1,90 @@
+import json
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from langchain_core.documents import Document
+
+_SQL_BATCH = 500
+
+
+# Same stable id ingestion uses for the Chroma record, for documents that arrive without one
+def doc_key(doc: Document) -> str:
+    md = doc.metadata or {}
+    if md.get("doc_id") is not None and md.get("chunk_id") is not None:
+        page = md.get("page")
+        return f"{md['doc_id']}::p{-1 if page is None else page}::c{md['chunk_id']}"
+    return str(md.get("content_hash") or doc.page_content)
+
+
+# Chunk text and metadata by stable id (doc_id::p<page>::c<chunk>). Reads the docs table the lexical
+# index keeps in sync with Chroma, so there is no second copy to maintain; an in-process LRU sits in
+# front and is dropped whenever another connection commits (re-ingest), so ids never serve stale text.
+class ChunkStore:
+    def __init__(self, path: Path, max_memory_entries: int = 2048):
+        self.path = Path(path)
+        self.max_memory_entries = max_memory_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, Tuple[str, dict]]" = OrderedDict()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._data_version: Optional[int] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version != self._data_version:
+            self._memory.clear()
+            self._data_version = version
+        return self._conn
+
+    def get_many(self, ids: Iterable[str]) -> Dict[str, Document]:
+        wanted = list(dict.fromkeys(ids))
+        found: Dict[str, Tuple[str, dict]] = {}
+        with self._lock:
+            conn = self._connect()
+            for cid in wanted:
+                hit = self._memory.get(cid)
+                if hit is not None:
+                    self._memory.move_to_end(cid)
+                    found[cid] = hit
+            self.memory_hits += len(found)
+
+            rest = [cid for cid in wanted if cid not in found]
+            for start in range(0, len(rest), _SQL_BATCH):
+                batch = rest[start : start + _SQL_BATCH]
+                rows = conn.execute(
+                    f"SELECT chunk_id, text, metadata FROM docs WHERE chunk_id IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for cid, text, md in rows:
+                    found[cid] = self._memory[cid] = (text, json.loads(md))
+                self.disk_hits += len(rows)
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+            self.misses += len(wanted) - len(found)
+
+        return {cid: Document(page_content=text, metadata=dict(md), id=cid) for cid, (text, md) in found.items()}
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "path": str(self.path),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_hit_ratio": round(self.memory_hits / lookups, 4) if lookups else None,
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.max_memory_entries,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
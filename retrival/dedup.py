@@ -0,0 +1,172 @@
+import re
+import sqlite3
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set
+
+import numpy as np
+
+_WORD = re.compile(r"\w+")
+_PRIME = np.uint64(4294967311)  # smallest prime above 2**32; a*h + b stays below 2**64 for 32-bit a, h, b
+
+
+# MinHash over word shingles; deterministic across processes (crc32, fixed seed)
+class MinHasher:
+    def __init__(self, num_perm: int = 128, shingle_size: int = 5, seed: int = 1):
+        rng = np.random.RandomState(seed)
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self._a = rng.randint(1, 2**32 - 1, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.randint(0, 2**32 - 1, size=(num_perm, 1), dtype=np.uint64)
+
+    def signature(self, text: str) -> np.ndarray:
+        words = _WORD.findall(text.lower())
+        k = self.shingle_size
+        shingles = {" ".join(words[i : i + k]) for i in range(max(1, len(words) - k + 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in shingles), dtype=np.uint64, count=len(shingles)
+        )
+        return ((hashes[None, :] * self._a + self._b) % _PRIME).min(axis=1)
+
+    @staticmethod
+    def similarity(a: np.ndarray, b: np.ndarray) -> float:
+        return float(np.mean(a == b))
+
+
+# Persistent MinHash/LSH index of canonical chunks plus the duplicates collapsed into them.
+# Rows carry the source file key so a changed or removed file can be dropped and re-indexed.
+class NearDupIndex:
+    def __init__(self, path: Path, hasher: Optional[MinHasher] = None, bands: int = 16):
+        self.hasher = hasher or MinHasher()
+        if self.hasher.num_perm % bands:
+            raise ValueError(f"num_perm ({self.hasher.num_perm}) must be divisible by bands ({bands})")
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS signatures (
+                chunk_id TEXT PRIMARY KEY, file_key TEXT NOT NULL, signature BLOB NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS signatures_file ON signatures (file_key);
+            CREATE TABLE IF NOT EXISTS bands (
+                band INTEGER NOT NULL, bucket INTEGER NOT NULL, chunk_id TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS bands_lookup ON bands (band, bucket);
+            CREATE INDEX IF NOT EXISTS bands_chunk ON bands (chunk_id);
+            CREATE TABLE IF NOT EXISTS duplicates (
+                chunk_id TEXT PRIMARY KEY, file_key TEXT NOT NULL,
+                canonical_id TEXT NOT NULL, canonical_file TEXT NOT NULL, ref TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS duplicates_file ON duplicates (file_key);
+            CREATE INDEX IF NOT EXISTS duplicates_canonical ON duplicates (canonical_id);
+            CREATE INDEX IF NOT EXISTS duplicates_canonical_file ON duplicates (canonical_file);
+            """
+        )
+        self._conn.commit()
+
+    def signature(self, text: str) -> np.ndarray:
+        return self.hasher.signature(text)
+
+    def _buckets(self, sig: np.ndarray) -> List[int]:
+        r = self.rows
+        return [zlib.crc32(sig[i * r : (i + 1) * r].tobytes()) for i in range(self.bands)]
+
+    # Most similar indexed canonical chunk at or above threshold, if any
+    def find(self, sig: np.ndarray, threshold: float) -> Optional[str]:
+        candidates: Set[str] = set()
+        for band, bucket in enumerate(self._buckets(sig)):
+            rows = self._conn.execute(
+                "SELECT chunk_id FROM bands WHERE band = ? AND bucket = ?", (band, bucket)
+            ).fetchall()
+            candidates.update(r[0] for r in rows)
+        if not candidates:
+            return None
+
+        best_id, best_sim = None, -1.0
+        for chunk_id in sorted(candidates):
+            row = self._conn.execute("SELECT signature FROM signatures WHERE chunk_id = ?", (chunk_id,)).fetchone()
+            if row is None:
+                continue
+            sim = self.hasher.similarity(sig, np.frombuffer(row[0], dtype=np.uint64))
+            if sim > best_sim:
+                best_id, best_sim = chunk_id, sim
+        return best_id if best_sim >= threshold else None
+
+    def add(self, chunk_id: str, file_key: str, sig: np.ndarray) -> None:
+        self._conn.execute(
+            "INSERT OR REPLACE INTO signatures (chunk_id, file_key, signature) VALUES (?, ?, ?)",
+            (chunk_id, file_key, sig.astype(np.uint64).tobytes()),
+        )
+        self._conn.executemany(
+            "INSERT INTO bands (band, bucket, chunk_id) VALUES (?, ?, ?)",
+            [(band, bucket, chunk_id) for band, bucket in enumerate(self._buckets(sig))],
+        )
+
+    def add_duplicate(self, chunk_id: str, file_key: str, canonical_id: str, ref: str) -> None:
+        row = self._conn.execute("SELECT file_key FROM signatures WHERE chunk_id = ?", (canonical_id,)).fetchone()
+        self._conn.execute(
+            "INSERT OR REPLACE INTO duplicates (chunk_id, file_key, canonical_id, canonical_file, ref) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (chunk_id, file_key, canonical_id, row[0] if row else "", ref),
+        )
+
+    def commit(self) -> None:
+        self._conn.commit()
+
+    # Files holding duplicates whose canonical chunk lives in one of `file_keys`
+    def dependents(self, file_keys: Iterable[str]) -> Set[str]:
+        out: Set[str] = set()
+        for key in set(file_keys):
+            rows = self._conn.execute(
+                "SELECT DISTINCT file_key FROM duplicates WHERE canonical_file = ?", (key,)
+            ).fetchall()
+            out.update(r[0] for r in rows)
+        return out
+
+    # Canonical ids that duplicates from `file_keys` were collapsed into
+    def canonicals_of(self, file_keys: Iterable[str]) -> Set[str]:
+        out: Set[str] = set()
+        for key in set(file_keys):
+            rows = self._conn.execute("SELECT canonical_id FROM duplicates WHERE file_key = ?", (key,)).fetchall()
+            out.update(r[0] for r in rows)
+        return out
+
+    # Drop every row that came from `file_keys`; returns canonical ids that lost an alternate
+    def remove_files(self, file_keys: Iterable[str]) -> Set[str]:
+        touched: Set[str] = set()
+        for key in set(file_keys):
+            rows = self._conn.execute("SELECT canonical_id FROM duplicates WHERE file_key = ?", (key,)).fetchall()
+            touched.update(r[0] for r in rows)
+            self._conn.execute("DELETE FROM duplicates WHERE file_key = ?", (key,))
+            self._conn.execute(
+                "DELETE FROM bands WHERE chunk_id IN (SELECT chunk_id FROM signatures WHERE file_key = ?)", (key,)
+            )
+            self._conn.execute("DELETE FROM signatures WHERE file_key = ?", (key,))
+        self._conn.commit()
+        return touched
+
+    def indexed_files(self) -> Set[str]:
+        rows = self._conn.execute(
+            "SELECT file_key FROM signatures UNION SELECT file_key FROM duplicates"
+        ).fetchall()
+        return {r[0] for r in rows}
+
+    def alternates(self, canonical_ids: Iterable[str]) -> Dict[str, List[str]]:
+        out: Dict[str, List[str]] = {}
+        for cid in set(canonical_ids):
+            rows = self._conn.execute(
+                "SELECT ref FROM duplicates WHERE canonical_id = ? ORDER BY chunk_id", (cid,)
+            ).fetchall()
+            out[cid] = [r[0] for r in rows]
+        return out
+
+    def duplicate_count(self) -> int:
+        return int(self._conn.execute("SELECT COUNT(*) FROM duplicates").fetchone()[0])
+
+    def close(self) -> None:
+        self._conn.close()
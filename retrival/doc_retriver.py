@@ -1,31 +1,100 @@
+import json
 import os
+from functools import lru_cache
 from pathlib import Path
-import streamlit as st
-from dotenv import load_dotenv
-
-load_dotenv()
-
-OPENAI_API_KEY = os.getenv("OPENAI_API_KEY") or st.secrets.get("OPENAI_API_KEY")
-if not OPENAI_API_KEY:
-    st.error("OPENAI_API_KEY is missing. Add it to Streamlit Secrets or local .env.")
-    st.stop()
-
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
+from typing import List, Optional
 
+from retrival.chunk_store import ChunkStore
+from retrival.embedding_cache import CachedQueryEmbeddings, EmbeddingCache, QueryEmbeddingCache
 from retrival.ingestion import ingest, IngestionConfig
+from retrival.hybrid_retriever import HybridRetriever
+from retrival.lexical_index import LexicalIndex
+from retrival.result_cache import RetrievalResultCache
+from retrival.settings import in_streamlit, openai_api_key
+from retrival.vector_index import INFO_FILE, NumpyVectorIndex, write_vector_index
 
 PERSIST_DIR = Path("./retrival/chroma")
 COLLECTION = "rag-chroma"
 DATASET_DIR = Path("./data")
+LEXICAL_INDEX_PATH = Path("./retrival/lexical_index.sqlite")
+EMBEDDING_MODEL = "text-embedding-3-small"
+
+# Graph state carries chunk ids; text is read back through this LRU from the lexical index's table
+CHUNK_STORE_MEMORY_ENTRIES = 2048
+
+# Query embeddings: in-process LRU backed by SQLite, keyed by normalized query text + model
+QUERY_CACHE_PATH = Path("./retrival/query_embedding_cache.sqlite")
+QUERY_CACHE_MEMORY_ENTRIES = 1024
+QUERY_CACHE_DISK_ENTRIES = 50_000
+
+# Top-k results per normalized query, invalidated when ingest() writes a new collection_version
+MANIFEST_PATH = Path("./ingestion_manifest.json")
+RESULT_CACHE_PATH = Path("./retrival/result_cache.sqlite")
+RESULT_CACHE_MAX_ENTRIES = 5000
+RESULT_CACHE_TTL_SECONDS = 7 * 24 * 3600
+
+# "hybrid" (BM25 + dense, rank-fused), "dense", or "lexical" (BM25 only, no embedding call)
+RETRIEVAL_MODE = os.getenv("RETRIEVAL_MODE", "hybrid")
+
+# Adaptive k: up to RETRIEVAL_MAX_K chunks per query, cutting candidates whose cosine similarity is below
+# the floor or more than the cliff below the query's best hit (each rule off when set to "none")
+RETRIEVAL_MAX_K = int(os.getenv("RETRIEVAL_MAX_K", "2"))
+RETRIEVAL_SIMILARITY_FLOOR = os.getenv("RETRIEVAL_SIMILARITY_FLOOR", "0.30")
+RETRIEVAL_SIMILARITY_CLIFF = os.getenv("RETRIEVAL_SIMILARITY_CLIFF", "0.08")
+
+# Dense search backend: "chroma", or "numpy" (exact cosine over the memory-mapped export in VECTOR_INDEX_DIR)
+VECTOR_BACKEND = os.getenv("VECTOR_BACKEND", "chroma")
+VECTOR_INDEX_DIR = Path("./retrival/vectors")
+
+_NO_DATA = (
+    "Vector store not found, and no PDFs were found in ./data.\n\n"
+    "To run this app on Streamlit Cloud, include PDFs under ./data "
+    "or build the vector store during deployment."
+)
+
+
+@lru_cache(maxsize=None)
+def _query_cache() -> QueryEmbeddingCache:
+    store = EmbeddingCache(QUERY_CACHE_PATH, max_entries=QUERY_CACHE_DISK_ENTRIES)
+    store.evict()
+    return QueryEmbeddingCache(store, max_memory_entries=QUERY_CACHE_MEMORY_ENTRIES)
 
 
-@st.cache_resource
+@lru_cache(maxsize=None)
 def _embeddings():
-    return OpenAIEmbeddings(model="text-embedding-3-small", api_key=OPENAI_API_KEY)
+    from langchain_openai import OpenAIEmbeddings
 
+    inner = OpenAIEmbeddings(model=EMBEDDING_MODEL, api_key=openai_api_key())
+    return CachedQueryEmbeddings(inner, _query_cache(), model=EMBEDDING_MODEL)
 
+
+# Query-style embeddings through the same two-level cache retrieval uses
+def embed_queries(texts: List[str]) -> List[List[float]]:
+    return _embeddings().embed_queries(texts)
+
+
+def query_embedding_cache_stats() -> dict:
+    return _query_cache().stats()
+
+
+@lru_cache(maxsize=None)
+def _result_cache() -> RetrievalResultCache:
+    return RetrievalResultCache(
+        RESULT_CACHE_PATH,
+        MANIFEST_PATH,
+        max_entries=RESULT_CACHE_MAX_ENTRIES,
+        ttl_seconds=RESULT_CACHE_TTL_SECONDS,
+    )
+
+
+def retrieval_cache_stats() -> dict:
+    return _result_cache().stats()
+
+
+@lru_cache(maxsize=None)
 def _vectorstore():
+    from langchain_chroma import Chroma
+
     return Chroma(
         collection_name=COLLECTION,
         embedding_function=_embeddings(),
@@ -33,6 +102,40 @@ def _vectorstore():
     )
 
 
+@lru_cache(maxsize=None)
+def _vector_index() -> NumpyVectorIndex:
+    return NumpyVectorIndex(VECTOR_INDEX_DIR, embeddings=_embeddings())
+
+
+def _dense_backend():
+    return _vector_index() if VECTOR_BACKEND == "numpy" else _vectorstore()
+
+
+def _collection_version() -> Optional[str]:
+    try:
+        return json.loads(MANIFEST_PATH.read_text(encoding="utf-8")).get("collection_version")
+    except (OSError, ValueError):
+        return None
+
+
+@lru_cache(maxsize=None)
+def get_chunk_store() -> ChunkStore:
+    return ChunkStore(LEXICAL_INDEX_PATH, max_memory_entries=CHUNK_STORE_MEMORY_ENTRIES)
+
+
+def chunk_store_stats() -> dict:
+    return get_chunk_store().stats()
+
+
+@lru_cache(maxsize=None)
+def _lexical_index():
+    return LexicalIndex(LEXICAL_INDEX_PATH)
+
+
+def _threshold(value: str) -> Optional[float]:
+    return None if value.strip().lower() in ("", "none", "off") else float(value)
+
+
 def _count(vs) -> int:
     try:
         return int(vs._collection.count())
@@ -47,30 +150,62 @@ def _has_pdfs(dataset_dir: Path) -> bool:
 def ensure_vectorstore_ready() -> None:
     vs = _vectorstore()
     if _count(vs) > 0:
+        # The lexical index is also the chunk store the graph reads text from: stores built without it,
+        # or left out of sync, are backfilled from Chroma (no re-embedding)
+        lexical = _lexical_index()
+        if lexical.count() != _count(vs):
+            lexical.sync(vs._collection)
+        if VECTOR_BACKEND == "numpy" and not (VECTOR_INDEX_DIR / INFO_FILE).exists():
+            write_vector_index(vs._collection, VECTOR_INDEX_DIR, version=_collection_version())
         return
 
     if not _has_pdfs(DATASET_DIR):
-        st.error(
-            "Vector store not found, and no PDFs were found in ./data.\n\n"
-            "To run this app on Streamlit Cloud, include PDFs under ./data "
-            "or build the vector store during deployment."
-        )
-        st.stop()
+        if in_streamlit():
+            import streamlit as st
+
+            st.error(_NO_DATA)
+            st.stop()
+        raise FileNotFoundError(_NO_DATA)
+
+    cfg = IngestionConfig(
+        dataset_dir=DATASET_DIR,
+        persist_directory=PERSIST_DIR,
+        collection_name=COLLECTION,
+        embedding_model=EMBEDDING_MODEL,
+        lexical_index_path=LEXICAL_INDEX_PATH,
+        vector_index_dir=VECTOR_INDEX_DIR,
+        manifest_path=MANIFEST_PATH,
+    )
+    if not in_streamlit():
+        ingest(cfg)
+        return
+
+    import streamlit as st
 
     with st.spinner("Building Chroma vector store from ./data ..."):
-        cfg = IngestionConfig(
-            dataset_dir=DATASET_DIR,
-            persist_directory=PERSIST_DIR,
-            collection_name=COLLECTION,
-            embedding_model="text-embedding-3-small",
-        )
         ingest(cfg)
 
     st.success("Vector store built. Reloading...")
     st.rerun()
 
 
-# Ensure DB exists before exposing retriever
-ensure_vectorstore_ready()
+# Built on first use (warm-up or the first research call), never at import
+@lru_cache(maxsize=None)
+def get_retriever() -> HybridRetriever:
+    ensure_vectorstore_ready()
+    return HybridRetriever(
+        vectorstore=_dense_backend(),
+        lexical=_lexical_index(),
+        k=RETRIEVAL_MAX_K,
+        mode=RETRIEVAL_MODE,
+        result_cache=_result_cache(),
+        similarity_floor=_threshold(RETRIEVAL_SIMILARITY_FLOOR),
+        similarity_cliff=_threshold(RETRIEVAL_SIMILARITY_CLIFF),
+    )
+
 
-retriever = _vectorstore().as_retriever(search_kwargs={"k": 2})
+# `from retrival.doc_retriver import retriever` keeps working, it just resolves lazily
+def __getattr__(name: str):
+    if name == "retriever":
+        return get_retriever()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
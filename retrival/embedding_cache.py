@@ -0,0 +1,188 @@
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.embeddings import Embeddings
+
+from retrival.sqlite_cache import SqliteCache
+
+
+# Same hash ingestion stores as chunk metadata["content_hash"]
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
+
+
+# Case and whitespace differences, and trailing punctuation, never change what a query is asking for
+def normalize_query(text: str) -> str:
+    return " ".join(text.lower().split()).rstrip(" ?.!")
+
+
+def _pack(vector: List[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def _unpack(blob: bytes) -> List[float]:
+    vec = array("f")
+    vec.frombytes(blob)
+    return vec.tolist()
+
+
+# SQLite store of float32 vectors keyed by (embedding model, content hash), LRU-evicted by row count
+class EmbeddingCache(SqliteCache):
+    table = "vectors"
+    columns = "vector BLOB NOT NULL"
+    # ingest() evicts once at the end of a run
+    evict_on_put = False
+
+    def __init__(self, path: Path, max_entries: int = 500_000):
+        super().__init__(path, max_entries)
+        self._migrate()
+
+    # Caches written before the shared store kept (model, content_hash) as a composite key
+    def _migrate(self) -> None:
+        with self._lock:
+            legacy = self._conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'embeddings'"
+            ).fetchone()
+            if legacy is None:
+                return
+            self._conn.execute(
+                "INSERT OR IGNORE INTO vectors (key, vector, created_at, last_used)"
+                " SELECT model || char(0) || content_hash, vector, last_used, last_used FROM embeddings"
+            )
+            self._conn.execute("DROP TABLE embeddings")
+            self._conn.commit()
+
+    @staticmethod
+    def _key(model: str, chash: str) -> str:
+        return f"{model}\x00{chash}"
+
+    def get_many(self, model: str, hashes: Iterable[str]) -> Dict[str, List[float]]:
+        keys = {self._key(model, h): h for h in hashes}
+        rows = self._get_rows(list(keys), "vector")
+        return {keys[key]: _unpack(blob) for key, (blob,) in rows.items()}
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        self._put_rows("vector", [(self._key(model, h), _pack(v)) for h, v in vectors.items()])
+
+
+# Embeddings wrapper that only sends cache misses to the underlying model
+class CachedEmbeddings(Embeddings):
+    def __init__(self, inner: Embeddings, cache: EmbeddingCache, model: str):
+        self.inner = inner
+        self.cache = cache
+        self.model = model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        hashes = [content_hash(t) for t in texts]
+        found = self.cache.get_many(self.model, hashes)
+
+        missing: Dict[str, str] = {}
+        for h, t in zip(hashes, texts):
+            if h not in found and h not in missing:
+                missing[h] = t
+
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model, fresh)
+            found.update(fresh)
+
+        return [found[h] for h in hashes]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.inner.embed_query(text)
+
+
+# Query vectors: a bounded in-process LRU in front of an optional persistent EmbeddingCache
+class QueryEmbeddingCache:
+    def __init__(self, store: Optional[EmbeddingCache] = None, max_memory_entries: int = 1024):
+        self.store = store
+        self.max_memory_entries = max_memory_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+
+    def _remember(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        with self._lock:
+            for key, vec in vectors.items():
+                self._memory[(model, key)] = vec
+                self._memory.move_to_end((model, key))
+            while len(self._memory) > self.max_memory_entries:
+                self._memory.popitem(last=False)
+
+    def get_many(self, model: str, keys: Iterable[str]) -> Dict[str, List[float]]:
+        wanted = list(dict.fromkeys(keys))
+        found: Dict[str, List[float]] = {}
+        with self._lock:
+            for key in wanted:
+                vec = self._memory.get((model, key))
+                if vec is not None:
+                    self._memory.move_to_end((model, key))
+                    found[key] = vec
+            self.memory_hits += len(found)
+
+        rest = [key for key in wanted if key not in found]
+        if rest and self.store is not None:
+            disk = self.store.get_many(model, rest)
+            self._remember(model, disk)
+            found.update(disk)
+            self.disk_hits += len(disk)
+        self.misses += len(wanted) - len(found)
+        return found
+
+    def put_many(self, model: str, vectors: Dict[str, List[float]]) -> None:
+        self._remember(model, vectors)
+        if self.store is not None:
+            self.store.put_many(model, vectors)
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "memory_hit_ratio": round(self.memory_hits / lookups, 4) if lookups else None,
+            "hit_ratio": round((self.memory_hits + self.disk_hits) / lookups, 4) if lookups else None,
+            "memory_entries": len(self._memory),
+            "max_memory_entries": self.max_memory_entries,
+            "disk": self.store.stats() if self.store is not None else None,
+        }
+
+
+# Embeddings wrapper for retrieval: query vectors are cached by normalized text, documents pass through
+class CachedQueryEmbeddings(Embeddings):
+    def __init__(self, inner: Embeddings, cache: QueryEmbeddingCache, model: str):
+        self.inner = inner
+        self.cache = cache
+        self.model = model
+
+    # Cache misses of a whole batch go out as one embeddings request
+    def embed_queries(self, texts: List[str]) -> List[List[float]]:
+        normalized = [normalize_query(t) for t in texts]
+        keys = [content_hash(n) for n in normalized]
+        found = self.cache.get_many(self.model, keys)
+
+        missing: Dict[str, str] = {}
+        for key, text in zip(keys, normalized):
+            if key not in found and key not in missing:
+                missing[key] = text
+
+        if missing:
+            vectors = self.inner.embed_documents(list(missing.values()))
+            fresh = dict(zip(missing.keys(), vectors))
+            self.cache.put_many(self.model, fresh)
+            found.update(fresh)
+
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_queries([text])[0]
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.inner.embed_documents(texts)
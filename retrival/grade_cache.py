@@ -0,0 +1,31 @@
+import hashlib
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+from retrival.embedding_cache import normalize_query
+from retrival.sqlite_cache import SqliteCache
+
+Pair = Tuple[str, str]
+
+
+# Relevance verdicts per (grader prompt version, normalized query, chunk content_hash). A prompt or model
+# change gives a new version, so old verdicts are simply never matched again and age out by TTL / LRU.
+class GradeCache(SqliteCache):
+    table = "grades"
+    columns = "grade TEXT NOT NULL"
+
+    def __init__(self, path: Path, max_entries: int = 100_000, ttl_seconds: Optional[float] = 30 * 24 * 3600):
+        super().__init__(path, max_entries, ttl_seconds)
+
+    @staticmethod
+    def _key(version: str, query: str, chash: str) -> str:
+        raw = f"{version}\x00{normalize_query(query)}\x00{chash}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    # pairs are (query, content_hash); returns the cached grade for each pair found
+    def get_many(self, version: str, pairs: Iterable[Pair]) -> Dict[Pair, str]:
+        keys = {self._key(version, q, h): (q, h) for q, h in dict.fromkeys(pairs)}
+        return {keys[key]: grade for key, (grade,) in self._get_rows(list(keys), "grade").items()}
+
+    def put_many(self, version: str, grades: Dict[Pair, str]) -> None:
+        self._put_rows("grade", [(self._key(version, q, h), grade) for (q, h), grade in grades.items()])
@@ -0,0 +1,160 @@
+from typing import Any, Dict, List, Literal, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from retrival.chunk_store import doc_key
+
+RetrievalMode = Literal["hybrid", "dense", "lexical"]
+
+
+# Chroma distances as cosine similarity. OpenAI embeddings are unit length, so squared L2 is 2 - 2cos
+def _similarity(distance: float, space: str) -> float:
+    return 1.0 - distance / 2.0 if space == "l2" else 1.0 - distance
+
+
+def _with_similarity(doc: Document, similarity: Optional[float], bound: bool = False) -> Document:
+    md = dict(doc.metadata or {})
+    md["similarity"] = None if similarity is None else round(float(similarity), 4)
+    md["similarity_bound"] = bound
+    return Document(page_content=doc.page_content, metadata=md, id=doc.id)
+
+
+# Reciprocal rank fusion: each ranking contributes 1 / (rrf_k + rank); only ranks matter, so BM25 and
+# vector distances never need to be put on the same scale
+def reciprocal_rank_fusion(rankings: Sequence[List[Document]], k: int, rrf_k: int = 60) -> List[Document]:
+    scores: Dict[str, float] = {}
+    docs: Dict[str, Document] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking):
+            key = doc_key(doc)
+            scores[key] = scores.get(key, 0.0) + 1.0 / (rrf_k + rank + 1)
+            docs.setdefault(key, doc)
+    order = sorted(scores, key=lambda key: scores[key], reverse=True)
+    return [docs[key] for key in order[:k]]
+
+
+# Fuses BM25 and dense rankings. "lexical" never calls the embeddings API; "dense" is the old behaviour.
+# k is the most documents returned per query; with a floor/cliff set, weak candidates are cut before it.
+class HybridRetriever(BaseRetriever):
+    vectorstore: Any
+    lexical: Any = None
+    k: int = 2
+    fetch_k: int = 10
+    rrf_k: int = 60
+    mode: RetrievalMode = "hybrid"
+    result_cache: Any = None
+    # Adaptive k (None disables each rule): cosine floor, and maximum drop below the best candidate
+    similarity_floor: Optional[float] = None
+    similarity_cliff: Optional[float] = None
+
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        return self.retrieve_many([query])[0]
+
+    # One embeddings request and one vector search for all queries; results per query, in order, with
+    # the cosine similarity in metadata["similarity"]. Query-caching embeddings only send their misses.
+    def _dense_many(self, queries: List[str], k: int) -> List[List[Document]]:
+        embeddings = self.vectorstore.embeddings
+        embed = getattr(embeddings, "embed_queries", embeddings.embed_documents)
+        vectors = embed(queries)
+
+        # In-process backends (NumpyVectorIndex) answer the whole batch with one matrix multiply
+        search = getattr(self.vectorstore, "search_by_vectors", None)
+        if search is not None:
+            return [[_with_similarity(doc, score) for doc, score in hits] for hits in search(vectors, k)]
+
+        collection = self.vectorstore._collection
+        space = ((collection.configuration or {}).get("hnsw") or {}).get("space", "l2")
+        res = collection.query(
+            query_embeddings=vectors, n_results=k, include=["documents", "metadatas", "distances"]
+        )
+        return [
+            [
+                _with_similarity(Document(page_content=text or "", metadata=md or {}, id=cid), _similarity(dist, space))
+                for cid, text, md, dist in zip(ids, texts, mds, dists)
+            ]
+            for ids, texts, mds, dists in zip(res["ids"], res["documents"], res["metadatas"], res["distances"])
+        ]
+
+    # Ranked candidates per query, up to fetch_k, so the similarity cut has something to choose from.
+    # A BM25-only hit ranked below every dense candidate, so the lowest dense similarity is an upper
+    # bound for it (similarity_bound=True).
+    def _retrieve(self, queries: List[str], mode: RetrievalMode) -> List[List[Document]]:
+        if mode == "dense":
+            return self._dense_many(queries, self.fetch_k)
+
+        lexical = [[doc for doc, _ in self.lexical.search(q, k=self.fetch_k)] for q in queries]
+        if mode == "lexical":
+            return [[_with_similarity(d, None) for d in docs[: self.k]] for docs in lexical]
+
+        dense = self._dense_many(queries, self.fetch_k)
+        out = []
+        for d, lx in zip(dense, lexical):
+            scored = {doc_key(doc): doc for doc in d}
+            floor = min((doc.metadata["similarity"] for doc in d), default=None)
+            fused = reciprocal_rank_fusion([d, lx], k=self.fetch_k, rrf_k=self.rrf_k)
+            out.append([scored.get(doc_key(doc)) or _with_similarity(doc, floor, bound=True) for doc in fused])
+        return out
+
+    # Adaptive k: walk the ranked candidates, skip any below the similarity floor or more than `cliff`
+    # below the best candidate, and stop at k. Candidates without a similarity (lexical mode) are kept.
+    # A BM25-only hit is cut on its upper bound (its real score can only be lower) but never sets the best.
+    def select(self, candidates: List[Document]) -> Tuple[List[Document], Dict[str, Any]]:
+        sims = [d.metadata.get("similarity") for d in candidates]
+        top = max(
+            (s for d, s in zip(candidates, sims) if s is not None and not d.metadata.get("similarity_bound")),
+            default=None,
+        )
+        cliff = self.similarity_cliff
+        kept: List[Document] = []
+        cut = {"floor": 0, "cliff": 0}
+        for doc, sim in zip(candidates, sims):
+            if len(kept) >= self.k:
+                break
+            if sim is not None and self.similarity_floor is not None and sim < self.similarity_floor:
+                cut["floor"] += 1
+                continue
+            if sim is not None and top is not None and cliff is not None and top - sim > cliff:
+                cut["cliff"] += 1
+                continue
+            kept.append(doc)
+        return kept, {
+            "candidates": len(candidates),
+            "kept": len(kept),
+            "top_similarity": top,
+            "similarities": [d.metadata.get("similarity") for d in kept],
+            "cut_floor": cut["floor"],
+            "cut_cliff": cut["cliff"],
+        }
+
+    # Cached queries skip embedding and search entirely; the rest are retrieved as one batch. The cache
+    # holds the uncut candidates, so changing the floor or cliff never needs an invalidation.
+    def _candidates_many(self, queries: List[str]) -> List[List[Document]]:
+        mode = self.mode if self.lexical is not None else "dense"
+
+        backend = type(self.vectorstore).__name__
+        params = f"{mode}:{backend}:k={self.k}:fetch_k={self.fetch_k}:rrf_k={self.rrf_k}:scored"
+        results: Dict[str, List[Document]] = {}
+        if self.result_cache is not None:
+            results = self.result_cache.get_many(params, queries)
+
+        todo = [q for q in dict.fromkeys(queries) if q not in results]
+        if todo:
+            fresh = dict(zip(todo, self._retrieve(todo, mode)))
+            if self.result_cache is not None:
+                self.result_cache.put_many(params, fresh)
+            results.update(fresh)
+        return [results[q] for q in queries]
+
+    # Selected documents plus a per-query score summary for the research trace
+    def retrieve_many_scored(self, queries: Sequence[str]) -> List[Tuple[List[Document], Dict[str, Any]]]:
+        queries = list(queries)
+        if not queries:
+            return []
+        return [self.select(candidates) for candidates in self._candidates_many(queries)]
+
+    def retrieve_many(self, queries: Sequence[str]) -> List[List[Document]]:
+        return [docs for docs, _ in self.retrieve_many_scored(queries)]
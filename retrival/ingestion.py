@@ -1,29 +1,27 @@
 import os
-import streamlit as st
-from dotenv import load_dotenv
-
-load_dotenv()
-
-OPENAI_API_KEY = (
-    os.getenv("OPENAI_API_KEY")
-    or st.secrets.get("OPENAI_API_KEY")
-)
-
 import hashlib
 import json
+import multiprocessing
 import re
-from collections import Counter, defaultdict
-from dataclasses import dataclass
+import tempfile
+import time
+from collections import Counter, defaultdict, deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Tuple
-from langchain_chroma import Chroma
+from typing import Dict, Iterator, List, Optional, Tuple
 from langchain_core.documents import Document
-from langchain_community.document_loaders import PyMuPDFLoader
+from langchain_core.embeddings import Embeddings
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 
-
-from langchain_openai import OpenAIEmbeddings
+from retrival.dedup import NearDupIndex
+from retrival.embedding_cache import CachedEmbeddings, EmbeddingCache
+from retrival.lexical_index import LexicalIndex
+from retrival.page_store import PageStore
+from retrival.settings import openai_api_key
+from retrival.token_splitter import TokenOffsetSplitter
+from retrival.vector_index import write_vector_index
 
 @dataclass(frozen=True)
 
@@ -40,16 +38,72 @@ class IngestionConfig:
     chunk_size_tokens: int = 1800
     chunk_overlap_tokens: int = 100
     max_chunk_chars: int = 2000
+    # "token": single-pass token-offset splitter; "recursive": tiktoken RecursiveCharacterTextSplitter + char limiter
+    splitter: str = "token"
 
    
+    # PyMuPDF reads the first N pages to choose the primary extractor; a page with fewer than
+    # min_page_chars characters is retried with the other extractor
+    extractor_probe_pages: int = 3
+    min_page_chars: int = 40
+
     header_footer_window_lines: int = 3
     repeat_line_min_len: int = 8
     repeat_line_ratio: float = 0.6
 
+    # 1 = extract in-process; >1 = process pool of that size; <=0 = one worker per CPU
+    extraction_workers: int = 1
+
+    # Only re-process PDFs whose fingerprint changed since the last manifest; upsert/delete the affected chunks
+    incremental: bool = False
+
+    # Local embedding cache keyed by (embedding_model, content_hash); None disables it
+    embedding_cache_path: Optional[Path] = Path("./retrival/embedding_cache.sqlite")
+    embedding_cache_max_entries: int = 500_000
+
+    # Streaming embed-and-upsert: chunks per embedding request and embedding requests in flight
+    embed_batch_size: int = 256
+    embed_concurrency: int = 4
+
+    # Cleaned page text per source-file hash, so re-chunking never re-parses unchanged PDFs; None disables it
+    page_cache_dir: Optional[Path] = Path("./retrival/page_cache")
+
+    # Chunks with MinHash similarity >= threshold to an indexed chunk are stored once (alt_sources on the
+    # canonical chunk); None disables near-duplicate elimination
+    near_dup_threshold: Optional[float] = 0.9
+    near_dup_index_path: Path = Path("./retrival/near_dup.sqlite")
+
+    # BM25 index mirrored from the collection after every run (text + metadata); None disables it
+    lexical_index_path: Optional[Path] = Path("./retrival/lexical_index.sqlite")
+
+    # Memory-mappable float32 matrix + row metadata for the in-process exact-search backend; None disables it
+    vector_index_dir: Optional[Path] = Path("./retrival/vectors")
+
+    # Compact codes for that backend: keep the leading vector_dims dimensions (None = all) stored as
+    # "float32", "float16", "int8" or "binary". Search ranks on the codes, then rescores
+    # vector_rescore_factor * k candidates against the full-precision matrix (kept on disk only if
+    # vector_rescore). Recall against exact search is measured on the eval prompts.
+    vector_dims: Optional[int] = None
+    vector_quantization: str = "float32"
+    vector_rescore: bool = True
+    vector_rescore_factor: int = 4
+    recall_eval_prompts: Optional[Path] = Path("./eval/test_prompts/test_prompts.jsonl")
+    recall_eval_k: int = 10
+
     manifest_path: Path = Path("./ingestion_manifest.json")
 
 
 
+# Settings that change the cleaned page text (the page store is keyed by these)
+_CLEANING_KEYS = (
+    "extractor_probe_pages",
+    "min_page_chars",
+    "header_footer_window_lines",
+    "repeat_line_min_len",
+    "repeat_line_ratio",
+)
+
+
 def _sha1(text: str) -> str:
     return hashlib.sha1(text.encode("utf-8", errors="ignore")).hexdigest()
 
@@ -67,46 +121,144 @@ def _normalize_text(text: str) -> str:
     return text.strip()
 
 
-# Pageloader with pdfplumber and PyMudf as fallback
-def _load_pdf_pages_pdfplumber(pdf_path: Path) -> List[Document]:
-    import pdfplumber
+# Page extractors, opened lazily and read one page at a time so parser page objects never pile up
+class _PyMuPDFPages:
+    name = "pymupdf"
 
-    docs: List[Document] = []
-    with pdfplumber.open(str(pdf_path)) as pdf:
-        for i, page in enumerate(pdf.pages):
-            text = page.extract_text() or ""
-            docs.append(Document(page_content=text, metadata={"page": i}))
-    return docs
+    def __init__(self, pdf_path: Path):
+        import pymupdf
 
-def _load_pdf_pages(pdf_path: Path) -> List[Document]:
-   
+        self._doc = pymupdf.open(str(pdf_path))
+
+    def __len__(self) -> int:
+        return len(self._doc)
+
+    def metadata(self) -> dict:
+        return {k: v for k, v in (self._doc.metadata or {}).items() if v}
+
+    def text(self, i: int) -> str:
+        return self._doc[i].get_text() or ""
+
+    def close(self) -> None:
+        self._doc.close()
+
+
+class _PdfPlumberPages:
+    name = "pdfplumber"
+
+    def __init__(self, pdf_path: Path):
+        import pdfplumber
+
+        self._pdf = pdfplumber.open(str(pdf_path))
+
+    def __len__(self) -> int:
+        return len(self._pdf.pages)
+
+    def text(self, i: int) -> str:
+        page = self._pdf.pages[i]
+        try:
+            return page.extract_text() or ""
+        finally:
+            page.close()
+
+    def close(self) -> None:
+        self._pdf.close()
+
+
+def _open_extractor(cls, pdf_path: Path):
     try:
-        docs = PyMuPDFLoader(str(pdf_path)).load()
+        return cls(pdf_path)
     except Exception:
-        docs = []
-
-    
-    total_chars = sum(len((d.page_content or "").strip()) for d in docs) if docs else 0
-    if not docs or total_chars < 200:
-        docs = _load_pdf_pages_pdfplumber(pdf_path)
+        return None
+
+
+# Pageloader: probe the first pages with PyMuPDF to pick the primary extractor (pdfplumber when the
+# probe finds next to no text), then fall back to the other extractor per page, not per file. Per-extractor
+# page counts and seconds go to `extractors`, never into page metadata, so metadata is stable across runs.
+def _iter_pdf_pages(
+    pdf_path: Path, cfg: IngestionConfig, extractors: Optional[Dict[str, Dict[str, float]]] = None
+) -> Iterator[Document]:
+    mu = _open_extractor(_PyMuPDFPages, pdf_path)
+    plumber = None if mu is not None else _open_extractor(_PdfPlumberPages, pdf_path)
+    if mu is None and plumber is None:
+        raise ValueError(f"No PDF extractor could open {pdf_path}")
+    plumber_tried = plumber is not None
+
+    def extract(name: str, i: int) -> Tuple[str, float]:
+        nonlocal plumber, plumber_tried
+        if name == "pymupdf":
+            if mu is None:
+                return "", 0.0
+            if i in probe:
+                return probe.pop(i)
+            ex = mu
+        else:
+            if not plumber_tried:
+                plumber = _open_extractor(_PdfPlumberPages, pdf_path)
+                plumber_tried = True
+            if plumber is None:
+                return "", 0.0
+            ex = plumber
+        t = time.perf_counter()
+        try:
+            text = ex.text(i)
+        except Exception:
+            text = ""
+        return text, time.perf_counter() - t
 
-    return docs
+    try:
+        n_pages = len(mu) if mu is not None else len(plumber)
+        base_meta = {**(mu.metadata() if mu is not None else {}), "file_path": str(pdf_path), "total_pages": n_pages}
+
+        probe: Dict[int, Tuple[str, float]] = {}
+        order = ("pymupdf", "pdfplumber")
+        if mu is not None:
+            for i in range(min(max(0, cfg.extractor_probe_pages), n_pages)):
+                t = time.perf_counter()
+                try:
+                    text = mu.text(i)
+                except Exception:
+                    text = ""
+                probe[i] = (text, time.perf_counter() - t)
+            if probe and all(len(text.strip()) < cfg.min_page_chars for text, _ in probe.values()):
+                order = ("pdfplumber", "pymupdf")
+        else:
+            order = ("pdfplumber",)
+
+        for i in range(n_pages):
+            text, seconds = extract(order[0], i)
+            used = order[0]
+            if len(text.strip()) < cfg.min_page_chars and len(order) > 1:
+                alt, alt_seconds = extract(order[1], i)
+                seconds += alt_seconds
+                if len(alt.strip()) > len(text.strip()):
+                    text, used = alt, order[1]
+            probe.pop(i, None)
+
+            if extractors is not None:
+                agg = extractors.setdefault(used, {"pages": 0, "seconds": 0.0})
+                agg["pages"] += 1
+                agg["seconds"] += seconds
+            yield Document(page_content=text, metadata={**base_meta, "page": i, "extractor": used})
+    finally:
+        for ex in (mu, plumber):
+            if ex is not None:
+                ex.close()
 
 
 #Header and footer removal 
-def _collect_repeated_lines(pages: List[str], cfg: IngestionConfig) -> set[str]:
-    candidates: List[str] = []
+# Candidate header/footer lines of one page: the long-enough lines of its first and last window
+def _edge_lines(text: str, cfg: IngestionConfig) -> List[str]:
+    lines = [ln.strip() for ln in text.splitlines()]
     w = cfg.header_footer_window_lines
+    head = [ln for ln in lines[:w] if len(ln) >= cfg.repeat_line_min_len]
+    tail = [ln for ln in lines[-w:] if len(ln) >= cfg.repeat_line_min_len]
+    return head + tail
 
-    for t in pages:
-        lines = [ln.strip() for ln in t.splitlines()]
-        head = [ln for ln in lines[:w] if len(ln) >= cfg.repeat_line_min_len]
-        tail = [ln for ln in lines[-w:] if len(ln) >= cfg.repeat_line_min_len]
-        candidates.extend(head)
-        candidates.extend(tail)
 
-    counts = Counter(candidates)
-    threshold = max(2, int(len(pages) * cfg.repeat_line_ratio))
+def _collect_repeated_lines(edges: List[List[str]], cfg: IngestionConfig) -> set[str]:
+    counts = Counter(ln for lines in edges for ln in lines)
+    threshold = max(2, int(len(edges) * cfg.repeat_line_ratio))
     return {ln for ln, c in counts.items() if c >= threshold}
 
 
@@ -121,35 +273,56 @@ def _strip_repeated_lines(page_text: str, repeated: set[str]) -> str:
 
 
 
-# Extract and clean documents from PDFS
-def _prepare_docs(pdf_path: Path, cfg: IngestionConfig) -> List[Document]:
-
-    pages = _load_pdf_pages(pdf_path)
-    raw_texts = [p.page_content or "" for p in pages]
-
-   
-    repeated = _collect_repeated_lines(raw_texts, cfg) if len(raw_texts) >= 3 else set()
-
-    cleaned: List[Document] = []
-    for p in pages:
-        text = p.page_content or ""
-        if repeated:
-            text = _strip_repeated_lines(text, repeated)
-        text = _normalize_text(text)
-
-        meta = dict(p.metadata or {})
-        meta["source"] = pdf_path.name
-        meta["source_path"] = str(pdf_path.as_posix())
-
-        if meta.get("page") is not None:
-            try:
-                meta["page"] = int(meta["page"])
-            except Exception:
-                meta["page"] = None
-
-        cleaned.append(Document(page_content=text, metadata=meta))
-
-    return cleaned
+# Accumulate wall time since t0 under `stage`; returns the new reference time
+def _lap(timings: Optional[Dict[str, float]], stage: str, t0: float) -> float:
+    now = time.perf_counter()
+    if timings is not None:
+        timings[stage] = timings.get(stage, 0.0) + (now - t0)
+    return now
+
+
+# Extract and clean documents from PDFS, one page at a time. Header/footer detection needs every page, so
+# the first pass keeps only each page's edge lines and spools the raw text to a temporary file; the second
+# pass reads it back, cleans and yields each page.
+def _prepare_docs(
+    pdf_path: Path,
+    cfg: IngestionConfig,
+    timings: Optional[Dict[str, float]] = None,
+    extractors: Optional[Dict[str, Dict[str, float]]] = None,
+) -> Iterator[Document]:
+    with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+        t = time.perf_counter()
+        edges: List[List[str]] = []
+        for p in _iter_pdf_pages(pdf_path, cfg, extractors):
+            text = p.page_content or ""
+            edges.append(_edge_lines(text, cfg))
+            spool.write(json.dumps([text, p.metadata], ensure_ascii=False) + "\n")
+        t = _lap(timings, "load", t)
+
+        repeated = _collect_repeated_lines(edges, cfg) if len(edges) >= 3 else set()
+        del edges
+        t = _lap(timings, "repeated_lines", t)
+
+        spool.seek(0)
+        for line in spool:
+            text, meta = json.loads(line)
+            if repeated:
+                text = _strip_repeated_lines(text, repeated)
+                t = _lap(timings, "repeated_lines", t)
+            text = _normalize_text(text)
+            t = _lap(timings, "normalize", t)
+
+            meta["source"] = pdf_path.name
+            meta["source_path"] = str(pdf_path.as_posix())
+
+            if meta.get("page") is not None:
+                try:
+                    meta["page"] = int(meta["page"])
+                except Exception:
+                    meta["page"] = None
+
+            yield Document(page_content=text, metadata=meta)
+            t = time.perf_counter()
 
 
 # Chunk limiter
@@ -177,17 +350,35 @@ def _enforce_max_chars(docs: List[Document], max_chars: int) -> List[Document]:
 
 
 
-# Split documents into chunks and asign metadata for citation
-def _split_and_tag(docs: List[Document], cfg: IngestionConfig) -> Tuple[List[Document], List[str]]:
-    
-    splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+def _split_docs(docs: List[Document], cfg: IngestionConfig) -> List[Document]:
+    if cfg.splitter == "recursive":
+        splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+            chunk_size=cfg.chunk_size_tokens,
+            chunk_overlap=cfg.chunk_overlap_tokens,
+            separators=["\n\n", "\n", ". ", " ", ""],
+        )
+        splits = splitter.split_documents(docs)
+        return _enforce_max_chars(splits, max_chars=cfg.max_chunk_chars)
+
+    if cfg.splitter != "token":
+        raise ValueError(f"Unknown splitter: {cfg.splitter!r} (expected 'token' or 'recursive')")
+
+    splitter = TokenOffsetSplitter(
         chunk_size=cfg.chunk_size_tokens,
         chunk_overlap=cfg.chunk_overlap_tokens,
-        separators=["\n\n", "\n", ". ", " ", ""],
+        max_chars=cfg.max_chunk_chars,
     )
+    return [
+        Document(page_content=text, metadata=dict(d.metadata))
+        for d in docs
+        for text in splitter.split_text(d.page_content or "")
+    ]
 
-    splits = splitter.split_documents(docs)
-    splits = _enforce_max_chars(splits, max_chars=cfg.max_chunk_chars)
+
+# Split documents into chunks and asign metadata for citation
+def _split_and_tag(docs: List[Document], cfg: IngestionConfig) -> Tuple[List[Document], List[str]]:
+    
+    splits = _split_docs(docs, cfg)
 
     
     per_page_counter: Dict[Tuple[str, int], int] = defaultdict(int)
@@ -229,66 +420,335 @@ def _split_and_tag(docs: List[Document], cfg: IngestionConfig) -> Tuple[List[Doc
 
 
 
-# Main ingestion function 
-def ingest(cfg: IngestionConfig = IngestionConfig()) -> dict:
-    if not cfg.dataset_dir.exists():
-        raise FileNotFoundError(f"Dataset folder not found: {cfg.dataset_dir.resolve()}")
+def _page_store(cfg: IngestionConfig) -> Optional[PageStore]:
+    if cfg.page_cache_dir is None:
+        return None
+    return PageStore(cfg.page_cache_dir, {k: getattr(cfg, k) for k in _CLEANING_KEYS})
 
-    pdf_files = sorted(p for p in cfg.dataset_dir.rglob("*.pdf") if p.is_file())
-    if not pdf_files:
-        raise FileNotFoundError(f"No PDF files found under: {cfg.dataset_dir.resolve()}")
 
-    all_docs: List[Document] = []
-    failures: List[dict] = []
+@dataclass
+class _PreparedFile:
+    docs: List[Document] = field(default_factory=list)
+    error: Optional[str] = None
+    from_cache: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+    extractors: Dict[str, Dict[str, float]] = field(default_factory=dict)
 
-   
-    for pdf in pdf_files:
-        try:
-            docs = _prepare_docs(pdf, cfg)
-            docs = [d for d in docs if (d.page_content or "").strip()]
-            all_docs.extend(docs)
-        except Exception as e:
-            failures.append({"file": str(pdf), "error": repr(e)})
 
-    
-    splits, ids = _split_and_tag(all_docs, cfg)
-
-    if not splits:
-        manifest = {
-            "ingested_at": datetime.utcnow().isoformat() + "Z",
-            "dataset_dir": str(cfg.dataset_dir.resolve()),
-            "collection_name": cfg.collection_name,
-            "persist_directory": str(cfg.persist_directory.resolve()),
-            "embedding_model": cfg.embedding_model,
-            "chunk_size_tokens": cfg.chunk_size_tokens,
-            "chunk_overlap_tokens": cfg.chunk_overlap_tokens,
-            "max_chunk_chars": cfg.max_chunk_chars,
-            "pdf_count": len(pdf_files),
-            "page_docs_count": len(all_docs),
-            "chunk_count": 0,
-            "failures": failures,
-            "error": "No chunks created (PDF extraction returned empty text).",
-        }
-        cfg.manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
-        return manifest
+# Extract a single PDF without raising, so one bad file never aborts the run (also the process pool entry point).
+# Cleaned pages are served from / written to the page store when the file hash is known.
+def _prepare_file(pdf_path: Path, cfg: IngestionConfig, file_hash: Optional[str] = None) -> _PreparedFile:
+    timings: Dict[str, float] = {}
+    try:
+        store = _page_store(cfg) if file_hash else None
+        if store is not None:
+            t = time.perf_counter()
+            cached = store.get(file_hash)
+            _lap(timings, "page_cache", t)
+            if cached is not None:
+                for d in cached:
+                    d.metadata["source"] = pdf_path.name
+                    d.metadata["source_path"] = str(pdf_path.as_posix())
+                return _PreparedFile(docs=cached, from_cache=True, timings=timings)
+
+        extractors: Dict[str, Dict[str, float]] = {}
+        docs = [d for d in _prepare_docs(pdf_path, cfg, timings, extractors) if (d.page_content or "").strip()]
+        if store is not None:
+            t = time.perf_counter()
+            store.put(file_hash, docs)
+            _lap(timings, "page_cache", t)
+        return _PreparedFile(docs=docs, timings=timings, extractors=extractors)
+    except Exception as e:
+        return _PreparedFile(error=repr(e), timings=timings)
+
+
+def _extraction_workers(cfg: IngestionConfig) -> int:
+    workers = int(cfg.extraction_workers or 0)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    return workers
+
+
+# Yield (pdf, prepared) in input order; with workers > 1 files are extracted in a process pool
+# with a bounded look-ahead window so finished files are handed over in order without piling up
+def _iter_prepared(jobs: List[Tuple[Path, Optional[str]]], cfg: IngestionConfig) -> Iterator[Tuple[Path, _PreparedFile]]:
+    workers = min(_extraction_workers(cfg), len(jobs))
+    if workers <= 1:
+        for pdf, file_hash in jobs:
+            yield pdf, _prepare_file(pdf, cfg, file_hash)
+        return
+
+    pending = iter(jobs)
+    window: deque = deque()
+
+    # By the time files are extracted ingest() has Chroma (native threads) and SQLite connections open;
+    # forking that process can deadlock a worker, so workers start from a fresh interpreter instead
+    methods = multiprocessing.get_all_start_methods()
+    context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+
+        def _submit() -> None:
+            job = next(pending, None)
+            if job is None:
+                return
+            pdf, file_hash = job
+            try:
+                window.append((pdf, pool.submit(_prepare_file, pdf, cfg, file_hash)))
+            except Exception as e:
+                # Pool is broken (e.g. a worker crashed inside a PDF parser)
+                window.append((pdf, e))
 
-    #Vectorstore dataset
-    embeddings = OpenAIEmbeddings(model="text-embedding-3-small", api_key=OPENAI_API_KEY    )
+        for _ in range(workers * 2):
+            _submit()
 
-    vectorstore = Chroma.from_documents(
-        documents=splits,
-        ids=ids,
-        collection_name=cfg.collection_name,
-        embedding=embeddings,
-        persist_directory=str(cfg.persist_directory),
-    )
+        while window:
+            pdf, fut = window.popleft()
+            _submit()
 
+            if isinstance(fut, Exception):
+                yield pdf, _PreparedFile(error=repr(fut))
+                continue
+            try:
+                prepared = fut.result()
+            except Exception as e:
+                prepared = _PreparedFile(error=repr(e))
+            yield pdf, prepared
+
+
+# Incremental bookkeeping: per-file fingerprints and per-chunk hashes are kept in the manifest
+
+# Settings that change chunk text or ids; if any differ from the previous run every file is re-processed
+_LAYOUT_KEYS = (
+    "collection_name",
+    "embedding_model",
+    "chunk_size_tokens",
+    "chunk_overlap_tokens",
+    "max_chunk_chars",
+    "splitter",
+    "near_dup_threshold",
+    "extractor_probe_pages",
+    "min_page_chars",
+    "header_footer_window_lines",
+    "repeat_line_min_len",
+    "repeat_line_ratio",
+)
+
+_DELETE_BATCH = 1000
+
+
+def _layout(cfg: IngestionConfig) -> dict:
+    layout = {k: getattr(cfg, k) for k in _LAYOUT_KEYS}
+    layout["persist_directory"] = str(cfg.persist_directory.resolve())
+    return layout
+
+
+def _load_manifest(path: Path) -> dict:
     try:
-        vectorstore.persist()
+        return json.loads(path.read_text(encoding="utf-8"))
     except Exception:
-        pass
+        return {}
+
+
+def _file_sha1(path: Path) -> str:
+    h = hashlib.sha1()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Size + mtime short-circuit so unchanged files are not re-read just to be hashed
+def _fingerprint(pdf_path: Path, previous: Optional[dict]) -> dict:
+    stat = pdf_path.stat()
+    fingerprint = None
+    if previous and previous.get("size") == stat.st_size and previous.get("mtime_ns") == stat.st_mtime_ns:
+        fingerprint = previous.get("fingerprint")
+    return {
+        "fingerprint": fingerprint or _file_sha1(pdf_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+    }
+
+
+def _file_key(pdf_path: Path) -> str:
+    return str(pdf_path.as_posix())
+
+
+# Chunk keys are stored relative to the file ("p<page>::c<chunk>"); the stable id is doc_id + key
+def _chunk_ids(entry: dict, keys) -> List[str]:
+    return [f"{entry['doc_id']}::{k}" for k in keys]
+
+
+def _collection_count(vs) -> int:
+    try:
+        return int(vs._collection.count())
+    except Exception:
+        return 0
 
-    manifest = {
+
+def _delete_ids(vectorstore, ids: List[str]) -> None:
+    for start in range(0, len(ids), _DELETE_BATCH):
+        vectorstore.delete(ids=ids[start : start + _DELETE_BATCH])
+
+
+def _checkpoint_path(cfg: IngestionConfig) -> Path:
+    return cfg.manifest_path.with_name(cfg.manifest_path.stem + ".checkpoint.jsonl")
+
+
+# Append-only log of files whose chunks are fully committed; lets a crashed run resume after the last committed batch
+class _Checkpoint:
+    def __init__(self, path: Path, layout: dict):
+        self.path = path
+        self.layout = layout
+        self._fh = None
+
+    def load(self) -> Dict[str, dict]:
+        entries: Dict[str, dict] = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                header = json.loads(f.readline() or "{}")
+                if header.get("layout") != self.layout:
+                    return {}
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        break  # torn last line from the crash
+                    entries[rec["file"]] = rec["entry"]
+        except (OSError, ValueError):
+            return {}
+        return entries
+
+    def open(self, resumed: Dict[str, dict]) -> None:
+        if resumed:
+            self._fh = open(self.path, "a", encoding="utf-8")
+            return
+        self._fh = open(self.path, "w", encoding="utf-8")
+        self._fh.write(json.dumps({"layout": self.layout}) + "\n")
+        self._fh.flush()
+
+    def commit(self, files: List[Tuple[str, dict]]) -> None:
+        if not files:
+            return
+        for key, entry in files:
+            self._fh.write(json.dumps({"file": key, "entry": entry}) + "\n")
+        self._fh.flush()
+        os.fsync(self._fh.fileno())
+
+    def close(self, remove: bool) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+        if remove:
+            self.path.unlink(missing_ok=True)
+
+
+# Buffers chunks into fixed-size batches, embeds up to `embed_concurrency` batches at once and
+# upserts them in submission order; a file is checkpointed with the batch that holds its last chunk
+class _BatchWriter:
+    def __init__(self, vectorstore, embeddings, cfg: IngestionConfig, checkpoint: _Checkpoint):
+        self._collection = vectorstore._collection
+        self._embeddings = embeddings
+        self._checkpoint = checkpoint
+        self._batch_size = max(1, cfg.embed_batch_size)
+        self._max_in_flight = max(1, cfg.embed_concurrency)
+        self._pool = ThreadPoolExecutor(max_workers=self._max_in_flight)
+        self._in_flight: deque = deque()
+
+        self._docs: List[Document] = []
+        self._ids: List[str] = []
+        self._files: List[Tuple[str, dict]] = []
+
+        self.batches = 0
+        self.upserted = 0
+        self.timings: Dict[str, float] = {"embed": 0.0, "upsert": 0.0}
+
+    # Runs on the pool; the elapsed time is folded into timings when the batch is committed
+    def _embed(self, texts: List[str]) -> Tuple[List[List[float]], float]:
+        t = time.perf_counter()
+        vectors = self._embeddings.embed_documents(texts)
+        return vectors, time.perf_counter() - t
+
+    def add(self, doc: Document, stable_id: str) -> None:
+        self._docs.append(doc)
+        self._ids.append(stable_id)
+        if len(self._docs) >= self._batch_size:
+            self._flush()
+
+    def file_done(self, key: str, entry: dict) -> None:
+        self._files.append((key, entry))
+
+    def _flush(self) -> None:
+        docs, ids, files = self._docs, self._ids, self._files
+        self._docs, self._ids, self._files = [], [], []
+
+        fut = None
+        if docs:
+            fut = self._pool.submit(self._embed, [d.page_content for d in docs])
+        self._in_flight.append((docs, ids, files, fut))
+
+        while len(self._in_flight) > self._max_in_flight:
+            self._commit_oldest()
+
+    def _commit_oldest(self) -> None:
+        docs, ids, files, fut = self._in_flight.popleft()
+        if fut is not None:
+            vectors, embed_seconds = fut.result()
+            self.timings["embed"] += embed_seconds
+            t = time.perf_counter()
+            self._collection.upsert(
+                ids=ids,
+                embeddings=vectors,
+                documents=[d.page_content for d in docs],
+                metadatas=[d.metadata for d in docs],
+            )
+            self.timings["upsert"] += time.perf_counter() - t
+            self.batches += 1
+            self.upserted += len(ids)
+        self._checkpoint.commit(files)
+
+    def close(self) -> None:
+        self._flush()
+        while self._in_flight:
+            self._commit_oldest()
+        self._pool.shutdown()
+
+    def abort(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _alt_ref(doc: Document) -> str:
+    md = doc.metadata
+    return f"{md.get('source', 'unknown')} (page {md.get('page_start')}, chunk {md.get('chunk_id')})"
+
+
+# Files whose collapsed chunks point (directly or transitively) at chunks of `dirty` files; they are
+# re-processed so a surviving copy becomes canonical again
+def _near_dup_dependents(index: NearDupIndex, dirty: set[str]) -> set[str]:
+    seen = set(dirty)
+    frontier = set(dirty)
+    while frontier:
+        frontier = index.dependents(frontier) - seen
+        seen |= frontier
+    return seen - dirty
+
+
+# Refresh alt_sources on canonical chunks whose set of collapsed duplicates changed
+def _update_alt_sources(vectorstore, index: NearDupIndex, canonical_ids: set[str]) -> None:
+    alternates = index.alternates(canonical_ids)
+    ids = sorted(alternates)
+    for start in range(0, len(ids), _DELETE_BATCH):
+        batch = ids[start : start + _DELETE_BATCH]
+        existing = vectorstore._collection.get(ids=batch, include=[])["ids"]
+        if existing:
+            vectorstore._collection.update(
+                ids=existing,
+                metadatas=[{"alt_sources": alternates[i] or None} for i in existing],
+            )
+
+
+def _manifest(cfg: IngestionConfig, pdf_files: List[Path], page_docs_count: int, chunk_count: int, failures: List[dict]) -> dict:
+    return {
         "ingested_at": datetime.utcnow().isoformat() + "Z",
         "dataset_dir": str(cfg.dataset_dir.resolve()),
         "collection_name": cfg.collection_name,
@@ -298,15 +758,303 @@ def ingest(cfg: IngestionConfig = IngestionConfig()) -> dict:
         "chunk_overlap_tokens": cfg.chunk_overlap_tokens,
         "max_chunk_chars": cfg.max_chunk_chars,
         "pdf_count": len(pdf_files),
-        "page_docs_count": len(all_docs),
-        "chunk_count": len(splits),
+        "page_docs_count": page_docs_count,
+        "chunk_count": chunk_count,
         "failures": failures,
     }
 
+
+# Changes exactly when the stored chunks (or their layout) change; retrieval caches key on it
+def _collection_version(cfg: IngestionConfig, files: Dict[str, dict]) -> str:
+    state = {
+        "layout": _layout(cfg),
+        "files": {k: [e.get("chunks") or {}, e.get("collapsed") or {}] for k, e in files.items()},
+    }
+    return hashlib.sha1(json.dumps(state, sort_keys=True).encode("utf-8")).hexdigest()[:16]
+
+
+def _eval_prompt_vectors(cfg: IngestionConfig, embeddings: Embeddings) -> Optional[List[List[float]]]:
+    path = cfg.recall_eval_prompts
+    if path is None or not path.exists():
+        return None
+    questions = []
+    for line in path.read_text(encoding="utf-8").splitlines():
+        if line.strip():
+            item = json.loads(line)
+            if not item.get("expect_invalid") and item.get("question"):
+                questions.append(item["question"])
+    return embeddings.embed_documents(questions) if questions else None
+
+
+# Main ingestion function; `embeddings` overrides the OpenAI model (e.g. a local stub for benchmarks)
+def ingest(cfg: IngestionConfig = IngestionConfig(), embeddings: Optional[Embeddings] = None) -> dict:
+    if not cfg.dataset_dir.exists():
+        raise FileNotFoundError(f"Dataset folder not found: {cfg.dataset_dir.resolve()}")
+
+    pdf_files = sorted(p for p in cfg.dataset_dir.rglob("*.pdf") if p.is_file())
+    if not pdf_files:
+        raise FileNotFoundError(f"No PDF files found under: {cfg.dataset_dir.resolve()}")
+
+    # Client libraries are imported here so extraction workers and importers never load them
+    from langchain_chroma import Chroma
+
+    if embeddings is None:
+        from langchain_openai import OpenAIEmbeddings
+
+        embeddings = OpenAIEmbeddings(model=cfg.embedding_model, api_key=openai_api_key())
+    cache = None
+    if cfg.embedding_cache_path is not None:
+        cache = EmbeddingCache(cfg.embedding_cache_path, max_entries=cfg.embedding_cache_max_entries)
+        embeddings = CachedEmbeddings(embeddings, cache, model=cfg.embedding_model)
+
+    vectorstore = Chroma(
+        collection_name=cfg.collection_name,
+        embedding_function=embeddings,
+        persist_directory=str(cfg.persist_directory),
+    )
+
+    # Previous state is only trusted if the layout matches and the collection still holds its chunks
+    previous = _load_manifest(cfg.manifest_path)
+    prev_files: Dict[str, dict] = previous.get("files") or {}
+    reuse = (
+        cfg.incremental
+        and previous.get("layout") == _layout(cfg)
+        and _collection_count(vectorstore) >= int(previous.get("chunk_count") or 0)
+    )
+
+    # Files fully committed by an interrupted run with the same layout are not processed again
+    checkpoint = _Checkpoint(_checkpoint_path(cfg), _layout(cfg))
+    resumed = checkpoint.load()
+
+    files: Dict[str, dict] = {}
+    to_process: List[Path] = []
+    for pdf in pdf_files:
+        key = _file_key(pdf)
+        old = prev_files.get(key)
+        done = resumed.get(key)
+        fp = _fingerprint(pdf, done or old)
+        if done and done.get("fingerprint") == fp["fingerprint"]:
+            files[key] = {**done, **fp}
+            continue
+        # A file that failed last run is retried even if it did not change
+        if reuse and old and "error" not in old and old.get("fingerprint") == fp["fingerprint"]:
+            files[key] = {**old, **fp}
+            continue
+        files[key] = {**fp, "doc_id": _sha1(key), "chunks": {}}
+        to_process.append(pdf)
+
+    removed = [k for k in prev_files if k not in files]
+
+    near_dup = None
+    touched_canonicals: set[str] = set()
+    if cfg.near_dup_threshold is not None:
+        near_dup = NearDupIndex(cfg.near_dup_index_path)
+        dirty = {_file_key(p) for p in to_process} | set(removed)
+        dependents = _near_dup_dependents(near_dup, dirty) & set(files)
+        if dependents:
+            to_process = [p for p in pdf_files if _file_key(p) in dirty or _file_key(p) in dependents]
+        stale_files = near_dup.indexed_files() - set(files)
+        touched_canonicals = near_dup.remove_files(dirty | dependents | stale_files)
+        # alt_sources of an interrupted run may not have been written yet
+        touched_canonicals |= near_dup.canonicals_of(k for k in resumed if k in files)
+
+    delete_ids: List[str] = []
+    for key in removed:
+        # Collapsed duplicates were never stored, so only the stored chunks have ids to delete
+        old_collapsed = prev_files[key].get("collapsed") or {}
+        old_chunks = prev_files[key].get("chunks") or {}
+        delete_ids.extend(_chunk_ids(prev_files[key], [k for k in old_chunks if k not in old_collapsed]))
+    _delete_ids(vectorstore, delete_ids)
+    deleted = len(delete_ids)
+
+    failures: List[dict] = []
+    page_docs_count = 0
+    chunks_seen = 0
+    page_cache_hits = 0
+    timings: Dict[str, float] = defaultdict(float)
+    extractors: Dict[str, Dict[str, float]] = {}
+
+    checkpoint.open(resumed)
+    writer = _BatchWriter(vectorstore, embeddings, cfg, checkpoint)
+
+    t0 = time.perf_counter()
+    try:
+        jobs = [(pdf, files[_file_key(pdf)]["fingerprint"]) for pdf in to_process]
+        for pdf, prepared in _iter_prepared(jobs, cfg):
+            key = _file_key(pdf)
+            for stage, seconds in prepared.timings.items():
+                timings[stage] += seconds
+            for name, stats in prepared.extractors.items():
+                agg = extractors.setdefault(name, {"pages": 0, "seconds": 0.0})
+                agg["pages"] += stats["pages"]
+                agg["seconds"] += stats["seconds"]
+            if prepared.error is not None:
+                failures.append({"file": str(pdf), "error": prepared.error})
+                # Keep the previously indexed chunks of a file that failed this time, marked for retry
+                files[key] = {**prev_files.get(key, files[key]), "error": prepared.error}
+                continue
+
+            page_docs_count += len(prepared.docs)
+            page_cache_hits += int(prepared.from_cache)
+            t = time.perf_counter()
+            splits, ids = _split_and_tag(prepared.docs, cfg)
+            t = _lap(timings, "split", t)
+            chunks_seen += len(splits)
+
+            entry = files[key]
+            entry["chunks"] = {sid.split("::", 1)[1]: d.metadata["content_hash"] for d, sid in zip(splits, ids)}
+
+            # Near-duplicates of an already indexed chunk are recorded against it instead of being stored
+            collapsed: Dict[str, str] = {}
+            if near_dup is not None:
+                for d, sid in zip(splits, ids):
+                    sig = near_dup.signature(d.page_content)
+                    canonical = near_dup.find(sig, cfg.near_dup_threshold)
+                    if canonical is None:
+                        near_dup.add(sid, key, sig)
+                        continue
+                    near_dup.add_duplicate(sid, key, canonical, _alt_ref(d))
+                    collapsed[sid.split("::", 1)[1]] = canonical
+                    touched_canonicals.add(canonical)
+                near_dup.commit()
+                _lap(timings, "near_dup", t)
+            entry["collapsed"] = collapsed
+
+            old = prev_files.get(key)
+            old_chunks = (old or {}).get("chunks") or {}
+            old_collapsed = (old or {}).get("collapsed") or {}
+            stored_before = {k for k in old_chunks if k not in old_collapsed}
+            if old:
+                stale = _chunk_ids(old, [k for k in stored_before if k not in entry["chunks"] or k in collapsed])
+                _delete_ids(vectorstore, stale)
+                deleted += len(stale)
+
+            for d, sid in zip(splits, ids):
+                chunk_key = sid.split("::", 1)[1]
+                if chunk_key in collapsed:
+                    continue
+                if not reuse or chunk_key not in stored_before or old_chunks.get(chunk_key) != d.metadata["content_hash"]:
+                    writer.add(d, sid)
+            writer.file_done(key, entry)
+
+        writer.close()
+        if near_dup is not None and touched_canonicals:
+            _update_alt_sources(vectorstore, near_dup, touched_canonicals)
+    except BaseException:
+        writer.abort()
+        checkpoint.close(remove=False)
+        if cache is not None:
+            cache.close()
+        if near_dup is not None:
+            near_dup.close()
+        raise
+    elapsed = time.perf_counter() - t0
+    for stage, seconds in writer.timings.items():
+        timings[stage] += seconds
+
+    collapsed_count = sum(len(e.get("collapsed") or {}) for e in files.values())
+    chunk_count = sum(len(e.get("chunks") or {}) for e in files.values()) - collapsed_count
+
+    manifest = _manifest(cfg, pdf_files, page_docs_count, chunk_count, failures)
+    manifest["throughput"] = {
+        "extraction_workers": min(_extraction_workers(cfg), max(1, len(to_process))),
+        "embed_batch_size": cfg.embed_batch_size,
+        "embed_concurrency": cfg.embed_concurrency,
+        "embed_batches": writer.batches,
+        "seconds": round(elapsed, 3),
+        "files_per_sec": round(len(to_process) / elapsed, 2) if elapsed > 0 else None,
+        "pages_per_sec": round(page_docs_count / elapsed, 2) if elapsed > 0 else None,
+        "chunks_per_sec": round(chunks_seen / elapsed, 2) if elapsed > 0 else None,
+    }
+    # Summed per-stage time; extraction and embedding stages overlap across workers, so they can exceed `seconds`
+    manifest["timings"] = {stage: round(seconds, 4) for stage, seconds in sorted(timings.items())}
+    manifest["extractors"] = {
+        name: {
+            "pages": int(stats["pages"]),
+            "seconds": round(stats["seconds"], 4),
+            "ms_per_page": round(stats["seconds"] * 1000 / stats["pages"], 3) if stats["pages"] else None,
+        }
+        for name, stats in sorted(extractors.items())
+    }
+    manifest["incremental"] = {
+        "enabled": cfg.incremental,
+        "reused_previous": reuse,
+        "resumed_files": sum(1 for k in resumed if k in files),
+        "processed_files": len(to_process),
+        "unchanged_files": len(pdf_files) - len(to_process),
+        "removed_files": len(removed),
+        "upserted_chunks": writer.upserted,
+        "deleted_chunks": deleted,
+    }
+    manifest["layout"] = _layout(cfg)
+    manifest["collection_version"] = _collection_version(cfg, files)
+    manifest["files"] = files
+
+    if near_dup is not None:
+        manifest["near_duplicates"] = {
+            "threshold": cfg.near_dup_threshold,
+            "collapsed_this_run": sum(len(files[_file_key(p)].get("collapsed") or {}) for p in to_process),
+            "collapsed_total": collapsed_count,
+            "canonicals_updated": len(touched_canonicals),
+        }
+        near_dup.close()
+
+    store = _page_store(cfg)
+    if store is not None:
+        manifest["page_cache"] = {
+            "path": str(cfg.page_cache_dir),
+            "hits": page_cache_hits,
+            "misses": len(to_process) - len(failures) - page_cache_hits,
+            "pruned": store.prune(e["fingerprint"] for e in files.values()),
+        }
+
+    if cfg.lexical_index_path is not None:
+        t = time.perf_counter()
+        lexical = LexicalIndex(cfg.lexical_index_path)
+        manifest["lexical_index"] = lexical.sync(vectorstore._collection)
+        lexical.close()
+        manifest["timings"]["lexical_index"] = round(time.perf_counter() - t, 4)
+
+    if cfg.vector_index_dir is not None:
+        t = time.perf_counter()
+        manifest["vector_index"] = write_vector_index(
+            vectorstore._collection,
+            cfg.vector_index_dir,
+            version=manifest["collection_version"],
+            dims=cfg.vector_dims,
+            quantization=cfg.vector_quantization,
+            rescore=cfg.vector_rescore,
+            rescore_factor=cfg.vector_rescore_factor,
+            eval_vectors_fn=lambda: _eval_prompt_vectors(cfg, embeddings),
+            eval_k=cfg.recall_eval_k,
+        )
+        manifest["timings"]["vector_index"] = round(time.perf_counter() - t, 4)
+
+    if chunk_count == 0:
+        manifest["error"] = "No chunks created (PDF extraction returned empty text)."
+
+    try:
+        vectorstore.persist()
+    except Exception:
+        pass
+
+    if cache is not None:
+        cache.evict()
+        manifest["embedding_cache"] = cache.stats()
+        cache.close()
+
     cfg.manifest_path.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+    checkpoint.close(remove=True)
     return manifest
 
 
 if __name__ == "__main__":
-    result = ingest()
-    print(json.dumps(result, indent=2))
\ No newline at end of file
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Ingest ./data PDFs into the Chroma vector store.")
+    parser.add_argument("--incremental", action="store_true", help="only re-process changed PDFs")
+    parser.add_argument("--workers", type=int, default=1, help="PDF extraction processes (<=0: one per CPU)")
+    args = parser.parse_args()
+
+    result = ingest(IngestionConfig(incremental=args.incremental, extraction_workers=args.workers))
+    print(json.dumps({k: v for k, v in result.items() if k != "files"}, indent=2))
@@ -0,0 +1,183 @@
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+_TERM = re.compile(r"\w+(?:[-/.']\w+)*")
+_PART = re.compile(r"\w+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by does do for from has have how in is it its of on or that the this to "
+    "was were what when which who why with".split()
+)
+
+
+# Lowercased terms; compounds like "PRADO-IC" or "NT-proBNP" are kept whole and also split into parts
+def tokenize(text: str) -> List[str]:
+    out: List[str] = []
+    for term in _TERM.findall(text.lower()):
+        parts = _PART.findall(term)
+        if len(parts) > 1:
+            out.append(term)
+        out.extend(p for p in parts if p not in _STOPWORDS and (len(p) > 1 or p.isdigit()))
+    return out
+
+
+def _metadata_fingerprint(metadata: dict) -> str:
+    return hashlib.sha1(json.dumps(metadata, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+# Okapi BM25 over the chunks stored in Chroma. Text, metadata and per-chunk term counts live in SQLite;
+# searches run against per-term weight arrays built in memory, so lexical lookups never touch the
+# vector store or the embeddings API.
+class LexicalIndex:
+    _SQL_BATCH = 500
+
+    def __init__(self, path: Path, k1: float = 1.2, b: float = 0.75):
+        self.path = Path(path)
+        self.k1 = k1
+        self.b = b
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS docs ("
+            " id INTEGER PRIMARY KEY,"
+            " chunk_id TEXT NOT NULL UNIQUE,"
+            " fingerprint TEXT NOT NULL,"
+            " metadata TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " terms TEXT NOT NULL"
+            ")"
+        )
+        self._conn.commit()
+
+        self._data_version: Optional[int] = None
+        self._row_ids = np.zeros(0, dtype=np.int64)
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0])
+
+    # Mirror a Chroma collection: drop ids it no longer has, (re)index ids whose metadata changed.
+    # content_hash is part of the metadata, so changed text is picked up the same way.
+    def sync(self, collection, batch_size: int = 1000) -> dict:
+        remote = {}
+        offset = 0
+        while True:
+            got = collection.get(include=["metadatas"], limit=batch_size, offset=offset)
+            ids = got.get("ids") or []
+            if not ids:
+                break
+            for cid, md in zip(ids, got.get("metadatas") or []):
+                remote[cid] = _metadata_fingerprint(md or {})
+            offset += len(ids)
+
+        with self._lock:
+            local = dict(self._conn.execute("SELECT chunk_id, fingerprint FROM docs").fetchall())
+            stale = [cid for cid in local if cid not in remote]
+            changed = [cid for cid, fp in remote.items() if local.get(cid) != fp]
+
+            drop = stale + [cid for cid in changed if cid in local]
+            for start in range(0, len(drop), self._SQL_BATCH):
+                batch = drop[start : start + self._SQL_BATCH]
+                self._conn.execute(f"DELETE FROM docs WHERE chunk_id IN ({','.join('?' * len(batch))})", batch)
+            for start in range(0, len(changed), batch_size):
+                got = collection.get(ids=changed[start : start + batch_size], include=["documents", "metadatas"])
+                self._conn.executemany(
+                    "INSERT INTO docs (chunk_id, fingerprint, metadata, text, terms) VALUES (?, ?, ?, ?, ?)",
+                    [
+                        (
+                            cid,
+                            _metadata_fingerprint(md or {}),
+                            json.dumps(md or {}, ensure_ascii=False),
+                            text or "",
+                            json.dumps(Counter(tokenize(text or ""))),
+                        )
+                        for cid, text, md in zip(got["ids"], got["documents"], got["metadatas"])
+                    ],
+                )
+            self._conn.commit()
+            self._data_version = None
+            total = int(self._conn.execute("SELECT COUNT(*) FROM docs").fetchone()[0])
+
+        return {"path": str(self.path), "indexed": len(changed), "removed": len(stale), "total": total}
+
+    # Rebuilt only when the database changed (own sync, or a commit from another process)
+    def _ensure_loaded(self) -> None:
+        version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if version == self._data_version:
+            return
+
+        rows = self._conn.execute("SELECT id, terms FROM docs ORDER BY id").fetchall()
+        n = len(rows)
+        counts = [json.loads(terms) for _, terms in rows]
+        lengths = np.array([sum(c.values()) for c in counts], dtype=np.float64)
+        avg_len = float(lengths.mean()) if n else 0.0
+        norm = self.k1 * (1 - self.b + self.b * lengths / (avg_len or 1.0))
+
+        by_term: Dict[str, Tuple[List[int], List[float]]] = {}
+        for i, c in enumerate(counts):
+            for term, tf in c.items():
+                idx, tfs = by_term.setdefault(term, ([], []))
+                idx.append(i)
+                tfs.append(tf)
+
+        postings: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        for term, (idx, tfs) in by_term.items():
+            rows_i = np.array(idx, dtype=np.int64)
+            tf = np.array(tfs, dtype=np.float64)
+            idf = np.log(1 + (n - len(idx) + 0.5) / (len(idx) + 0.5))
+            postings[term] = (rows_i, idf * tf * (self.k1 + 1) / (tf + norm[rows_i]))
+
+        self._row_ids = np.array([r for r, _ in rows], dtype=np.int64)
+        self._postings = postings
+        self._data_version = version
+
+    # Top-k chunks by BM25; scores are positive, higher is better
+    def search(self, query: str, k: int = 4) -> List[Tuple[Document, float]]:
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms or k <= 0:
+            return []
+
+        with self._lock:
+            self._ensure_loaded()
+            scores = np.zeros(len(self._row_ids), dtype=np.float64)
+            for term in terms:
+                hit = self._postings.get(term)
+                if hit is not None:
+                    scores[hit[0]] += hit[1]
+
+            matched = np.flatnonzero(scores)
+            if matched.size == 0:
+                return []
+            if matched.size > k:
+                matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+            top = matched[np.argsort(-scores[matched], kind="stable")]
+
+            ids = [int(self._row_ids[i]) for i in top]
+            rows = self._conn.execute(
+                f"SELECT id, chunk_id, text, metadata FROM docs WHERE id IN ({','.join('?' * len(ids))})", ids
+            ).fetchall()
+
+        found = {rid: (cid, text, md) for rid, cid, text, md in rows}
+        return [
+            (
+                Document(page_content=found[rid][1], metadata=json.loads(found[rid][2]), id=found[rid][0]),
+                float(scores[i]),
+            )
+            for rid, i in zip(ids, top)
+            if rid in found
+        ]
+
+    def close(self) -> None:
+        self._conn.close()
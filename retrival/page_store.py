@@ -0,0 +1,56 @@
+import gzip
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Iterable, List, Optional
+
+from langchain_core.documents import Document
+
+# Bump when the extraction/cleaning code changes the text it produces
+CLEANING_VERSION = 2
+
+
+# Cleaned per-page text of each PDF, one gzip JSONL file per (source file hash, cleaning settings)
+class PageStore:
+    def __init__(self, root: Path, cleaning_settings: dict):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        settings = json.dumps({**cleaning_settings, "version": CLEANING_VERSION}, sort_keys=True)
+        self.cleaning_key = hashlib.sha1(settings.encode("utf-8")).hexdigest()[:12]
+
+    def _path(self, file_hash: str) -> Path:
+        return self.root / f"{file_hash}-{self.cleaning_key}.jsonl.gz"
+
+    def get(self, file_hash: str) -> Optional[List[Document]]:
+        path = self._path(file_hash)
+        if not path.exists():
+            return None
+        try:
+            docs: List[Document] = []
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                for line in f:
+                    rec = json.loads(line)
+                    docs.append(Document(page_content=rec["text"], metadata=rec["metadata"]))
+            return docs
+        except (OSError, ValueError, KeyError):
+            return None
+
+    # Written to a temp file and renamed so concurrent workers never see a partial entry
+    def put(self, file_hash: str, docs: List[Document]) -> None:
+        path = self._path(file_hash)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=6) as f:
+            for d in docs:
+                f.write(json.dumps({"text": d.page_content, "metadata": d.metadata}, ensure_ascii=False) + "\n")
+        os.replace(tmp, path)
+
+    # Remove entries whose source file is no longer part of the dataset
+    def prune(self, keep_hashes: Iterable[str]) -> int:
+        keep = set(keep_hashes)
+        removed = 0
+        for path in self.root.glob("*.jsonl.gz"):
+            if path.name.split("-", 1)[0] not in keep:
+                path.unlink(missing_ok=True)
+                removed += 1
+        return removed
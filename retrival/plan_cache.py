@@ -0,0 +1,100 @@
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from retrival.embedding_cache import normalize_query
+from retrival.sqlite_cache import SqliteCache
+
+
+# Planner output per (planner prompt version, normalized question). Entries can also carry the question's
+# embedding, so a lookup can fall back to the most similar cached question of the same version. A new
+# prompt version never matches older rows; they age out by TTL / LRU.
+class PlanCache(SqliteCache):
+    table = "plans"
+    columns = "version TEXT NOT NULL, question TEXT NOT NULL, tasks TEXT NOT NULL, vector BLOB"
+
+    def __init__(self, path: Path, max_entries: int = 5000, ttl_seconds: Optional[float] = 30 * 24 * 3600):
+        super().__init__(path, max_entries, ttl_seconds)
+        # A nearest() match after an exact get() miss counts as a similar hit
+        self.similar_hits = 0
+
+        # Unit vectors of the current version's rows, rebuilt when the table changes
+        self._matrix_state: Optional[Tuple[str, int, int]] = None
+        self._keys: List[str] = []
+        self._matrix = np.zeros((0, 0), dtype=np.float32)
+        self._writes = 0
+
+    @staticmethod
+    def _key(version: str, question: str) -> str:
+        return hashlib.sha1(f"{version}\x00{normalize_query(question)}".encode("utf-8")).hexdigest()
+
+    def _touch(self, key: str, now: float) -> None:
+        self._conn.execute("UPDATE plans SET last_used = ? WHERE key = ?", (now, key))
+        self._conn.commit()
+
+    def get(self, version: str, question: str) -> Optional[List[str]]:
+        key = self._key(version, question)
+        row = self._get_rows([key], "tasks").get(key)
+        return None if row is None else json.loads(row[0])
+
+    # Best cached plan of this version whose question embedding has cosine >= min_similarity
+    def nearest(
+        self, version: str, vector: Sequence[float], min_similarity: float
+    ) -> Optional[Tuple[List[str], float, str]]:
+        q = np.asarray(vector, dtype=np.float32)
+        q = q / (np.linalg.norm(q) or 1.0)
+        now = time.time()
+        with self._lock:
+            self._load_matrix(version)
+            if not self._keys or self._matrix.shape[1] != q.shape[0]:
+                return None
+            sims = self._matrix @ q
+            best = int(np.argmax(sims))
+            if float(sims[best]) < min_similarity:
+                return None
+            row = self._conn.execute(
+                "SELECT tasks, question, created_at FROM plans WHERE key = ?", (self._keys[best],)
+            ).fetchone()
+            if row is None or not self._fresh(row[2], now):
+                return None
+            self._touch(self._keys[best], now)
+        self.similar_hits += 1
+        return json.loads(row[0]), float(sims[best]), row[1]
+
+    def _load_matrix(self, version: str) -> None:
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        state = (version, data_version, self._writes)
+        if state == self._matrix_state:
+            return
+        rows = self._conn.execute(
+            "SELECT key, vector FROM plans WHERE version = ? AND vector IS NOT NULL", (version,)
+        ).fetchall()
+        vecs = [np.frombuffer(blob, dtype=np.float32) for _, blob in rows]
+        dims = {len(v) for v in vecs}
+        if len(dims) == 1:
+            matrix = np.vstack(vecs)
+            self._matrix = matrix / np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+            self._keys = [key for key, _ in rows]
+        else:
+            self._matrix, self._keys = np.zeros((0, 0), dtype=np.float32), []
+        self._matrix_state = state
+
+    def put(self, version: str, question: str, tasks: List[str], vector: Optional[Sequence[float]] = None) -> None:
+        blob = None if vector is None else np.asarray(vector, dtype=np.float32).tobytes()
+        row = (self._key(version, question), version, normalize_query(question), json.dumps(tasks), blob)
+        self._put_rows("version, question, tasks, vector", [row])
+        self._writes += 1
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        lookups = self.hits + self.misses
+        stats.update(
+            similar_hits=self.similar_hits,
+            misses=self.misses - self.similar_hits,
+            hit_ratio=round((self.hits + self.similar_hits) / lookups, 4) if lookups else None,
+        )
+        return stats
@@ -0,0 +1,94 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from langchain_core.documents import Document
+
+from retrival.embedding_cache import normalize_query
+from retrival.sqlite_cache import SqliteCache
+
+
+# Top-k results per (normalized query, retrieval params, collection version). The version is the
+# collection_version ingest() writes to the manifest; when it changes every older entry is dropped.
+# Without a manifest (or without a version in it) the cache stays out of the way.
+class RetrievalResultCache(SqliteCache):
+    table = "results"
+    columns = "version TEXT NOT NULL, docs TEXT NOT NULL"
+
+    def __init__(
+        self,
+        path: Path,
+        manifest_path: Path,
+        max_entries: int = 5000,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+    ):
+        super().__init__(path, max_entries, ttl_seconds)
+        self.manifest_path = Path(manifest_path)
+        self.invalidated = 0
+
+        self._manifest_stat: Optional[Tuple[int, int]] = None
+        self._version: Optional[str] = None
+
+    # Re-read only when the manifest file changed on disk
+    def version(self) -> Optional[str]:
+        try:
+            st = os.stat(self.manifest_path)
+        except OSError:
+            self._manifest_stat, self._version = None, None
+            return None
+        stat = (st.st_mtime_ns, st.st_size)
+        if stat != self._manifest_stat:
+            try:
+                version = json.loads(self.manifest_path.read_text(encoding="utf-8")).get("collection_version")
+            except (OSError, ValueError):
+                version = None
+            self._manifest_stat = stat
+            if version != self._version and version is not None:
+                with self._lock:
+                    cur = self._conn.execute("DELETE FROM results WHERE version != ?", (version,))
+                    self._conn.commit()
+                self.invalidated += cur.rowcount
+            self._version = version
+        return self._version
+
+    @staticmethod
+    def _key(version: str, params: str, query: str) -> str:
+        raw = f"{version}\x00{params}\x00{normalize_query(query)}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def get_many(self, params: str, queries: Iterable[str]) -> Dict[str, List[Document]]:
+        version = self.version()
+        queries = list(dict.fromkeys(queries))
+        if version is None or not queries:
+            return {}
+
+        keys = {self._key(version, params, q): q for q in queries}
+        return {
+            keys[key]: [
+                Document(page_content=d["page_content"], metadata=d["metadata"], id=d.get("id"))
+                for d in json.loads(docs)
+            ]
+            for key, (docs,) in self._get_rows(list(keys), "docs").items()
+        }
+
+    def put_many(self, params: str, results: Dict[str, List[Document]]) -> None:
+        version = self.version()
+        if version is None:
+            return
+        rows = [
+            (
+                self._key(version, params, q),
+                version,
+                json.dumps(
+                    [{"page_content": d.page_content, "metadata": d.metadata, "id": d.id} for d in docs],
+                    ensure_ascii=False,
+                ),
+            )
+            for q, docs in results.items()
+        ]
+        self._put_rows("version, docs", rows)
+
+    def stats(self) -> dict:
+        return {**super().stats(), "collection_version": self._version, "invalidated": self.invalidated}
@@ -0,0 +1,35 @@
+import os
+import sys
+from functools import lru_cache
+
+from dotenv import load_dotenv
+
+_MISSING_KEY = "OPENAI_API_KEY is missing. Add it to Streamlit Secrets or local .env."
+
+
+def in_streamlit() -> bool:
+    if "streamlit" not in sys.modules:
+        return False
+    try:
+        from streamlit import runtime
+
+        return runtime.exists()
+    except Exception:
+        return False
+
+
+# Resolved on first use, not at import: .env / environment first, Streamlit secrets as the fallback
+@lru_cache(maxsize=None)
+def openai_api_key() -> str:
+    load_dotenv()
+    key = os.getenv("OPENAI_API_KEY")
+    if not key:
+        try:
+            import streamlit as st
+
+            key = st.secrets.get("OPENAI_API_KEY")
+        except Exception:
+            key = None
+    if not key:
+        raise RuntimeError(_MISSING_KEY)
+    return key
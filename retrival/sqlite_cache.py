@@ -0,0 +1,136 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# SQLite store shared by the embedding, result, plan and grade caches: one WAL connection behind a lock,
+# rows keyed by `key` with created_at / last_used, TTL on created_at, LRU eviction by last_used and
+# hit/miss counters. Subclasses only declare the table name, its value columns and how keys are built.
+class SqliteCache:
+    table = ""
+    # Column definitions stored next to key / created_at / last_used, e.g. "grade TEXT NOT NULL"
+    columns = ""
+    # False leaves eviction to explicit evict() calls (bulk writers that evict once per run)
+    evict_on_put = True
+
+    _SQL_BATCH = 500
+
+    def __init__(self, path: Path, max_entries: Optional[int], ttl_seconds: Optional[float] = None):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {self.table} ("
+            f" key TEXT PRIMARY KEY, {self.columns},"
+            " created_at REAL NOT NULL,"
+            " last_used REAL NOT NULL"
+            ") WITHOUT ROWID"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {self.table}_last_used ON {self.table} (last_used)")
+        self._conn.commit()
+
+    def _fresh(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is None or now - created_at <= self.ttl_seconds
+
+    # Value columns of every fresh row among `keys`; expired rows are deleted, hits are touched
+    def _get_rows(self, keys: Sequence[str], columns: str) -> Dict[str, tuple]:
+        keys = list(dict.fromkeys(keys))
+        if not keys:
+            return {}
+        now = time.time()
+        found: Dict[str, tuple] = {}
+        stale: List[str] = []
+        with self._lock:
+            for start in range(0, len(keys), self._SQL_BATCH):
+                batch = keys[start : start + self._SQL_BATCH]
+                rows = self._conn.execute(
+                    f"SELECT key, created_at, {columns} FROM {self.table} WHERE key IN ({','.join('?' * len(batch))})",
+                    batch,
+                ).fetchall()
+                for key, created_at, *values in rows:
+                    if self._fresh(created_at, now):
+                        found[key] = tuple(values)
+                    else:
+                        stale.append(key)
+            if stale:
+                self._conn.executemany(f"DELETE FROM {self.table} WHERE key = ?", [(k,) for k in stale])
+            if found:
+                self._conn.executemany(
+                    f"UPDATE {self.table} SET last_used = ? WHERE key = ?", [(now, k) for k in found]
+                )
+            if stale or found:
+                self._conn.commit()
+
+        self.expired += len(stale)
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+        return found
+
+    # rows are (key, *values) in the order of `columns`
+    def _put_rows(self, columns: str, rows: List[Tuple]) -> None:
+        if not rows:
+            return
+        now = time.time()
+        marks = ",".join("?" * (len(rows[0]) + 2))
+        with self._lock:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO {self.table} (key, {columns}, created_at, last_used) VALUES ({marks})",
+                [(*row, now, now) for row in rows],
+            )
+            if self.evict_on_put:
+                self._evict_locked()
+            self._conn.commit()
+
+    def _evict_locked(self) -> int:
+        if self.max_entries is None or self.max_entries <= 0:
+            return 0
+        excess = int(self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]) - self.max_entries
+        if excess <= 0:
+            return 0
+        self._conn.execute(
+            f"DELETE FROM {self.table} WHERE key IN (SELECT key FROM {self.table} ORDER BY last_used LIMIT ?)",
+            (excess,),
+        )
+        self.evicted += excess
+        return excess
+
+    # Drop least recently used rows beyond max_entries
+    def evict(self) -> int:
+        with self._lock:
+            excess = self._evict_locked()
+            self._conn.commit()
+        return excess
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0])
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "path": str(self.path),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else None,
+            "entries": self.count(),
+            "expired": self.expired,
+            "evicted": self.evicted,
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
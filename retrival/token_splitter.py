@@ -0,0 +1,108 @@
+import bisect
+from itertools import accumulate
+from typing import List, Sequence
+
+import tiktoken
+
+SEPARATORS = ("\n\n", "\n", ". ", " ")
+
+# 1 for UTF-8 continuation bytes, used to turn token byte offsets into char offsets
+_CONTINUATION = bytes(1 if 0x80 <= b < 0xC0 else 0 for b in range(256))
+
+
+# Single-pass splitter: each text is tokenized once, chunk boundaries are chosen on token offsets
+# (preferring the strongest separator in the back half of the window) and the token and char
+# limits are enforced together, so no piece is ever re-tokenized.
+class TokenOffsetSplitter:
+    def __init__(
+        self,
+        chunk_size: int,
+        chunk_overlap: int,
+        max_chars: int,
+        encoding_name: str = "gpt2",
+        separators: Sequence[str] = SEPARATORS,
+        min_break_ratio: float = 0.5,
+    ):
+        if chunk_overlap >= chunk_size:
+            raise ValueError(f"chunk_overlap ({chunk_overlap}) must be smaller than chunk_size ({chunk_size})")
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.max_chars = max_chars
+        self.encoding_name = encoding_name
+        self.separators = tuple(separators)
+        self.min_break_ratio = min_break_ratio
+        self._enc = None
+
+    @property
+    def encoding(self):
+        if self._enc is None:
+            self._enc = tiktoken.get_encoding(self.encoding_name)
+        return self._enc
+
+    # Char offset where each token starts, plus len(text) as a sentinel
+    def _token_offsets(self, text: str) -> List[int]:
+        enc = self.encoding
+        tokens = enc.encode(text, disallowed_special=())
+        byte_offsets = list(accumulate(map(len, enc.decode_tokens_bytes(tokens)), initial=0))
+        if text.isascii():
+            return byte_offsets
+        # chars started before byte b, minus one when b falls inside a char (same convention as decode_with_offsets)
+        flags = text.encode("utf-8").translate(_CONTINUATION) + b"\x00"
+        continuation = list(accumulate(flags, initial=0))
+        return [b - continuation[b] - flags[b] for b in byte_offsets]
+
+    @staticmethod
+    def _at_word_start(text: str, pos: int) -> bool:
+        return pos == 0 or text[pos].isspace() or text[pos - 1].isspace()
+
+    def _find_break(self, text: str, start: int, end: int) -> int:
+        lo = start + int((end - start) * self.min_break_ratio)
+        for sep in self.separators:
+            idx = text.rfind(sep, lo, end)
+            if idx != -1:
+                return idx + len(sep)
+        return end
+
+    def split_text(self, text: str) -> List[str]:
+        if not text or not text.strip():
+            return []
+
+        offsets = self._token_offsets(text)
+        n = len(offsets) - 1
+        chunks: List[str] = []
+
+        start_tok = 0
+        while start_tok < n:
+            start_c = offsets[start_tok]
+            end_tok = min(n, start_tok + self.chunk_size)
+
+            # Char limit on the same offsets: last token boundary within max_chars
+            limit_c = start_c + self.max_chars
+            if offsets[end_tok] > limit_c:
+                end_tok = bisect.bisect_right(offsets, limit_c, start_tok + 1, end_tok + 1) - 1
+                end_tok = max(end_tok, start_tok + 1)
+
+            if end_tok < n:
+                cut = self._find_break(text, start_c, offsets[end_tok])
+                snapped = bisect.bisect_right(offsets, cut, start_tok + 1, end_tok + 1) - 1
+                if snapped > start_tok:
+                    end_tok = snapped
+
+            end_c = offsets[end_tok]
+            piece = text[start_c:end_c].strip()
+            # A single token longer than max_chars is the only way to overshoot; slice it like the old limiter
+            for i in range(0, len(piece), self.max_chars):
+                part = piece[i : i + self.max_chars].strip()
+                if part:
+                    chunks.append(part)
+
+            if end_tok >= n:
+                break
+            # Overlap never exceeds half the window, so short char-limited windows still advance;
+            # it starts on a word boundary so chunks never open mid-word
+            next_tok = end_tok - min(self.chunk_overlap, (end_tok - start_tok) // 2)
+            while next_tok < end_tok and not self._at_word_start(text, offsets[next_tok]):
+                next_tok += 1
+            start_tok = next_tok
+
+        return chunks
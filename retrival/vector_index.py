@@ -0,0 +1,320 @@
+import json
+import os
+import shutil
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from langchain_core.documents import Document
+
+MATRIX_FILE = "matrix.npy"
+CODES_FILE = "codes.npy"
+SCALES_FILE = "scales.npy"
+ROWS_FILE = "rows.sqlite"
+INFO_FILE = "info.json"
+
+QUANTIZATIONS = ("float32", "float16", "int8", "binary")
+
+_SCAN_BLOCK = 8192
+_POPCOUNT = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint16)
+
+
+def _normalize(x: np.ndarray) -> np.ndarray:
+    x = np.asarray(x, dtype=np.float32)
+    norms = np.linalg.norm(x, axis=1, keepdims=True)
+    return x / np.where(norms == 0, 1.0, norms)
+
+
+# text-embedding-3 vectors can be shortened by keeping the leading dimensions and renormalizing
+def _reduce(x: np.ndarray, dims: Optional[int]) -> np.ndarray:
+    return _normalize(x[:, :dims] if dims else x)
+
+
+def _encode(block: np.ndarray, quantization: str, scales: Optional[np.ndarray]) -> np.ndarray:
+    if quantization == "float16":
+        return block.astype(np.float16)
+    if quantization == "int8":
+        return np.clip(np.rint(block / scales), -127, 127).astype(np.int8)
+    if quantization == "binary":
+        return np.packbits(block > 0, axis=1)
+    return block
+
+
+# Approximate similarity of every code row to each (reduced, normalized) query: (n x b).
+# Scanned in blocks so float16/int8 codes are only widened a block at a time.
+def _code_scores(codes: np.ndarray, q: np.ndarray, quantization: str, scales: Optional[np.ndarray]) -> np.ndarray:
+    out = np.empty((codes.shape[0], q.shape[0]), dtype=np.float32)
+    if quantization == "binary":
+        bits = np.packbits(q > 0, axis=1)
+        nbits = q.shape[1]
+        for start in range(0, codes.shape[0], _SCAN_BLOCK):
+            block = codes[start : start + _SCAN_BLOCK]
+            hamming = _POPCOUNT[block[:, None, :] ^ bits[None, :, :]].sum(axis=2)
+            # Signed before subtracting (the popcount sum is unsigned); scaled to [-1, 1] like cosine
+            out[start : start + len(block)] = (nbits - 2 * hamming.astype(np.int32)) / nbits
+        return out
+
+    qt = (q * scales).T if quantization == "int8" else q.T
+    for start in range(0, codes.shape[0], _SCAN_BLOCK):
+        block = codes[start : start + _SCAN_BLOCK]
+        out[start : start + len(block)] = block.astype(np.float32, copy=False) @ qt
+    return out
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    k = min(k, scores.shape[1])
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    order = np.argsort(-np.take_along_axis(scores, top, axis=1), axis=1, kind="stable")
+    return np.take_along_axis(top, order, axis=1)
+
+
+def _settings(dims: Optional[int], quantization: str, rescore: bool, rescore_factor: int) -> dict:
+    if quantization not in QUANTIZATIONS:
+        raise ValueError(f"Unknown vector quantization {quantization!r}; expected one of {QUANTIZATIONS}")
+    compact = bool(dims) or quantization != "float32"
+    return {
+        "dims": dims or None,
+        "quantization": quantization,
+        "rescore": bool(rescore and compact),
+        "rescore_factor": rescore_factor,
+    }
+
+
+# Export a Chroma collection as a row-normalized float32 matrix (.npy, memory-mappable) plus a compact
+# row -> (chunk id, text, metadata) table, and optionally compact codes (leading `dims` dimensions,
+# float16/int8/binary). The full matrix is kept only when search rescores against it. Written to a
+# temp dir and swapped in, so readers never see a half-written index.
+def write_vector_index(
+    collection,
+    directory: Path,
+    version: Optional[str] = None,
+    dims: Optional[int] = None,
+    quantization: str = "float32",
+    rescore: bool = True,
+    rescore_factor: int = 4,
+    eval_vectors_fn: Optional[Callable[[], Optional[Sequence[Sequence[float]]]]] = None,
+    eval_k: int = 10,
+    batch_size: int = 1000,
+) -> dict:
+    directory = Path(directory)
+    settings = _settings(dims, quantization, rescore, rescore_factor)
+    info_path = directory / INFO_FILE
+    if version is not None and info_path.exists():
+        try:
+            info = json.loads(info_path.read_text(encoding="utf-8"))
+            if info.get("collection_version") == version and info.get("settings") == settings:
+                return {**info, "path": str(directory), "rebuilt": False}
+        except (OSError, ValueError):
+            pass
+
+    tmp = directory.with_name(f"{directory.name}.tmp-{os.getpid()}")
+    shutil.rmtree(tmp, ignore_errors=True)
+    tmp.mkdir(parents=True)
+
+    conn = sqlite3.connect(str(tmp / ROWS_FILE))
+    conn.execute(
+        "CREATE TABLE rows (row INTEGER PRIMARY KEY, chunk_id TEXT NOT NULL, text TEXT NOT NULL, metadata TEXT NOT NULL)"
+    )
+
+    total = int(collection.count())
+    matrix = None
+    row = 0
+    offset = 0
+    while offset < total:
+        got = collection.get(include=["embeddings", "documents", "metadatas"], limit=batch_size, offset=offset)
+        ids = got.get("ids") or []
+        if not ids:
+            break
+        vecs = np.asarray(got["embeddings"], dtype=np.float32)
+        if matrix is None:
+            matrix = np.lib.format.open_memmap(
+                tmp / MATRIX_FILE, mode="w+", dtype=np.float32, shape=(total, vecs.shape[1])
+            )
+        matrix[row : row + len(ids)] = _normalize(vecs)
+        conn.executemany(
+            "INSERT INTO rows (row, chunk_id, text, metadata) VALUES (?, ?, ?, ?)",
+            [
+                (row + j, cid, text or "", json.dumps(md or {}, ensure_ascii=False))
+                for j, (cid, text, md) in enumerate(zip(ids, got["documents"], got["metadatas"]))
+            ],
+        )
+        row += len(ids)
+        offset += len(ids)
+    conn.commit()
+    conn.close()
+
+    if matrix is None:
+        matrix = np.zeros((0, 0), dtype=np.float32)
+        np.save(tmp / MATRIX_FILE, matrix)
+    else:
+        matrix.flush()
+    dim = int(matrix.shape[1])
+
+    compact = settings["dims"] is not None or quantization != "float32"
+    code_dims = min(settings["dims"] or dim, dim)
+    if compact and row:
+        scales = None
+        if quantization == "int8":
+            peak = np.zeros(code_dims, dtype=np.float32)
+            for start in range(0, row, _SCAN_BLOCK):
+                peak = np.maximum(peak, np.abs(_reduce(matrix[start : start + _SCAN_BLOCK], code_dims)).max(axis=0))
+            scales = np.where(peak == 0, 1.0, peak / 127).astype(np.float32)
+            np.save(tmp / SCALES_FILE, scales)
+
+        first = _encode(_reduce(matrix[:1], code_dims), quantization, scales)
+        codes = np.lib.format.open_memmap(tmp / CODES_FILE, mode="w+", dtype=first.dtype, shape=(row, first.shape[1]))
+        for start in range(0, row, _SCAN_BLOCK):
+            codes[start : start + _SCAN_BLOCK] = _encode(
+                _reduce(matrix[start : start + _SCAN_BLOCK], code_dims), quantization, scales
+            )
+        codes.flush()
+        del codes
+
+    info = {
+        "rows": row,
+        "dim": dim,
+        "code_dims": code_dims if compact else dim,
+        "collection_version": version,
+        "settings": settings,
+    }
+    (tmp / INFO_FILE).write_text(json.dumps(info, indent=2), encoding="utf-8")
+
+    # Recall of the compact search against exact float32 search, measured before the full matrix goes.
+    # The eval queries are only embedded when the index is actually rebuilt.
+    eval_vectors = eval_vectors_fn() if compact and row and eval_vectors_fn is not None else None
+    if eval_vectors is not None and len(eval_vectors):
+        q = _normalize(np.asarray(eval_vectors, dtype=np.float32))
+        truth = _top_k((matrix @ q.T).T, eval_k)
+        index = NumpyVectorIndex(tmp)
+        recall = {"prompts": len(q), "k": eval_k}
+        for label, use_rescore in (("codes_only", False), ("rescored", True)):
+            if use_rescore and not settings["rescore"]:
+                continue
+            found = index._search_rows(q, eval_k, rescore=use_rescore)[0]
+            hits = sum(len(set(f.tolist()) & set(t.tolist())) for f, t in zip(found, truth))
+            recall[f"recall_at_k_{label}"] = round(hits / truth.size, 4)
+        index.close()
+        final = recall.get("recall_at_k_rescored", recall["recall_at_k_codes_only"])
+        recall["recall_delta"] = round(final - 1.0, 4)
+        info["recall"] = recall
+
+    del matrix
+    if compact and not settings["rescore"]:
+        (tmp / MATRIX_FILE).unlink()
+
+    full_bytes = row * dim * 4
+    scan_bytes = (tmp / (CODES_FILE if compact and row else MATRIX_FILE)).stat().st_size
+    disk_bytes = sum(p.stat().st_size for p in tmp.iterdir())
+    info["bytes"] = {
+        "full_float32": full_bytes,
+        "scanned_per_query": scan_bytes,
+        "on_disk": disk_bytes,
+        "scan_savings": round(1 - scan_bytes / full_bytes, 4) if full_bytes else None,
+    }
+    (tmp / INFO_FILE).write_text(json.dumps(info, indent=2), encoding="utf-8")
+
+    old = directory.with_name(f"{directory.name}.old-{os.getpid()}")
+    if directory.exists():
+        os.replace(directory, old)
+    os.replace(tmp, directory)
+    shutil.rmtree(old, ignore_errors=True)
+    return {**info, "path": str(directory), "rebuilt": True}
+
+
+# Cosine top-k over the exported index; a batch of queries is one pass over the matrix (or over the
+# compact codes, followed by full-precision rescoring of the top candidates). Reloads itself when
+# ingest() swaps in a new export.
+class NumpyVectorIndex:
+    def __init__(self, directory: Path, embeddings: Any = None):
+        self.directory = Path(directory)
+        self.embeddings = embeddings
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None
+        self._matrix: Optional[np.ndarray] = None
+        self._codes: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None
+        self._conn: Optional[sqlite3.Connection] = None
+        self.info: dict = {}
+        self._load()
+
+    def _load(self) -> None:
+        st = os.stat(self.directory / INFO_FILE)
+        stamp = (st.st_mtime_ns, st.st_ino)
+        if stamp == self._stamp:
+            return
+        self.info = json.loads((self.directory / INFO_FILE).read_text(encoding="utf-8"))
+
+        def _maybe(name: str) -> Optional[np.ndarray]:
+            path = self.directory / name
+            return np.load(path, mmap_mode="r") if path.exists() else None
+
+        self._matrix = _maybe(MATRIX_FILE)
+        self._codes = _maybe(CODES_FILE)
+        self._scales = _maybe(SCALES_FILE)
+        if self._conn is not None:
+            self._conn.close()
+        self._conn = sqlite3.connect(f"file:{self.directory / ROWS_FILE}?mode=ro", uri=True, check_same_thread=False)
+        self._stamp = stamp
+
+    def count(self) -> int:
+        return int(self.info.get("rows") or 0)
+
+    # Row ids and scores per query, best first
+    def _search_rows(self, q: np.ndarray, k: int, rescore: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+        settings = self.info.get("settings") or {}
+        if self._codes is None:
+            # (n x d) @ (d x b) streams the matrix once for the whole batch
+            scores = (self._matrix @ q.T).T
+            top = _top_k(scores, k)
+            return top, np.take_along_axis(scores, top, axis=1)
+
+        quantization = settings.get("quantization", "float32")
+        approx = _code_scores(self._codes, _reduce(q, self.info.get("code_dims")), quantization, self._scales).T
+        if not (rescore and settings.get("rescore") and self._matrix is not None):
+            top = _top_k(approx, k)
+            return top, np.take_along_axis(approx, top, axis=1)
+
+        candidates = _top_k(approx, k * max(1, int(settings.get("rescore_factor") or 1)))
+        tops, scores = [], []
+        for qi, rows in zip(q, candidates):
+            rows = np.sort(rows)
+            exact = np.asarray(self._matrix[rows], dtype=np.float32) @ qi
+            best = _top_k(exact[None, :], k)[0]
+            tops.append(rows[best])
+            scores.append(exact[best])
+        return np.array(tops), np.array(scores)
+
+    def search_by_vectors(self, vectors: Sequence[Sequence[float]], k: int) -> List[List[Tuple[Document, float]]]:
+        with self._lock:
+            self._load()
+            if self.count() == 0 or k <= 0 or len(vectors) == 0:
+                return [[] for _ in vectors]
+
+            top, top_scores = self._search_rows(_normalize(np.asarray(vectors, dtype=np.float32)), k)
+
+            wanted = sorted({int(r) for r in top.ravel()})
+            rows = self._conn.execute(
+                f"SELECT row, chunk_id, text, metadata FROM rows WHERE row IN ({','.join('?' * len(wanted))})", wanted
+            ).fetchall()
+
+        by_row = {r: (cid, text, md) for r, cid, text, md in rows}
+        out: List[List[Tuple[Document, float]]] = []
+        for row_ids, row_scores in zip(top, top_scores):
+            hits = []
+            for r, s in zip(row_ids, row_scores):
+                cid, text, md = by_row[int(r)]
+                hits.append((Document(page_content=text, metadata=json.loads(md), id=cid), float(s)))
+            out.append(hits)
+        return out
+
+    def similarity_search(self, query: str, k: int = 4) -> List[Document]:
+        vector = self.embeddings.embed_query(query)
+        return [doc for doc, _ in self.search_by_vectors([vector], k)[0]]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,42 @@
+import pytest
+import tiktoken
+
+
+# Minimal stand-in for a Chroma collection: just the get()/count() surface the indexes read
+class FakeCollection:
+    def __init__(self, records):
+        self.records = dict(records)
+
+    def count(self):
+        return len(self.records)
+
+    def get(self, ids=None, include=(), limit=None, offset=0):
+        keys = list(self.records) if ids is None else [i for i in ids if i in self.records]
+        if ids is None:
+            keys = keys[offset : None if limit is None else offset + limit]
+        out = {"ids": keys}
+        for field, pos in (("documents", 0), ("metadatas", 1), ("embeddings", 2)):
+            if field in include:
+                out[field] = [self.records[k][pos] for k in keys]
+        return out
+
+
+@pytest.fixture(scope="session")
+def make_collection():
+    # records: {chunk_id: (text, metadata, embedding)}
+    return FakeCollection
+
+
+# Small byte-level BPE so the tests run offline; offsets only depend on the token byte boundaries
+@pytest.fixture(scope="session")
+def encoding():
+    ranks = {bytes([i]): i for i in range(256)}
+    for a in b"etaoin srhdl":
+        for b in b"etaoin srhdl":
+            ranks[bytes([a, b])] = len(ranks)
+    return tiktoken.Encoding(
+        name="test-bpe",
+        pat_str=r"""'s|'t|'re|'ve|'m|'ll|'d| ?\p{L}+| ?\p{N}+| ?[^\s\p{L}\p{N}]+|\s+(?!\S)|\s+""",
+        mergeable_ranks=ranks,
+        special_tokens={},
+    )
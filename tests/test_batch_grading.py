@@ -0,0 +1,97 @@
+import pytest
+from langchain_core.documents import Document
+
+from graph.agents import AGENT_Research as research
+from graph.agents.AGENT_Research import ChunkVerdict, GradeBatch, GradeDocuments, _grade_with_llm, _valid_verdicts
+from graph.utils import evidence
+
+
+# Records every request; answers come from `answer(inputs)`, one per input
+class FakeGrader:
+    def __init__(self, answer):
+        self.answer = answer
+        self.requests = []
+
+    def batch(self, inputs, config=None, return_exceptions=False):
+        self.requests.append(list(inputs))
+        return [self.answer(i) for i in inputs]
+
+
+def _batch(*verdicts):
+    return GradeBatch(verdicts=[ChunkVerdict(index=i, binary_score=s) for i, s in verdicts])
+
+
+def _items(n):
+    return [
+        {"query": f"question {i}", "text": f"document {i}", "doc": Document(page_content=f"document {i}")}
+        for i in range(n)
+    ]
+
+
+@pytest.fixture
+def graders(monkeypatch, encoding):
+    monkeypatch.setattr(evidence, "_encoding", lambda: encoding)
+    single = FakeGrader(lambda i: GradeDocuments(binary_score="yes" if i["question"].endswith("1") else "no"))
+    batch = FakeGrader(lambda i: _batch((1, "yes"), (2, "no"), (3, "yes")))
+    monkeypatch.setattr(research, "get_retrieval_grader", lambda: single)
+    monkeypatch.setattr(research, "get_batch_retrieval_grader", lambda: batch)
+    return single, batch
+
+
+def test_valid_verdicts_keep_only_clean_answers():
+    result = _batch((1, " Yes "), (2, "maybe"), (3, "no"), (3, "no"), (4, "yes"), (4, "no"), (0, "yes"), (7, "yes"))
+    # 2 is malformed, 4 conflicts, 5 is missing, 0 and 7 are out of range; the agreeing duplicate 3 stays
+    assert _valid_verdicts(result, 5) == {1: "yes", 3: "no"}
+
+
+@pytest.mark.parametrize("result", [None, RuntimeError("timeout"), {"verdicts": [{"index": 1, "binary_score": "yes"}]}])
+def test_valid_verdicts_reject_anything_but_a_batch(result):
+    assert _valid_verdicts(result, 3) == {}
+
+
+def test_clean_batch_needs_no_fallback(graders):
+    single, batch = graders
+    items = _items(3)
+
+    assert _grade_with_llm(items) == {"batch_requests": 1, "single_requests": 0, "batch_fallbacks": 0}
+    assert [(i["grade"], i["grader"]) for i in items] == [("yes", "batch"), ("no", "batch"), ("yes", "batch")]
+    assert "[3] User question: question 2" in batch.requests[0][0]["pairs"]
+    assert single.requests == []
+
+
+def test_partial_and_conflicting_verdicts_fall_back_per_document(graders):
+    single, batch = graders
+    batch.answer = lambda i: _batch((1, "no"), (2, "yes"), (2, "no"))
+    items = _items(3)
+
+    assert _grade_with_llm(items) == {"batch_requests": 1, "single_requests": 2, "batch_fallbacks": 2}
+    assert [(i["grade"], i["grader"]) for i in items] == [("no", "batch"), ("yes", "single"), ("no", "single")]
+    assert [r["question"] for r in single.requests[0]] == ["question 1", "question 2"]
+
+
+def test_failed_batch_request_falls_back_for_every_pair(graders):
+    single, batch = graders
+    batch.answer = lambda i: RuntimeError("rate limited")
+    items = _items(3)
+
+    assert _grade_with_llm(items) == {"batch_requests": 1, "single_requests": 3, "batch_fallbacks": 3}
+    assert all(i["grader"] == "single" for i in items)
+    assert [i["grade"] for i in items] == ["no", "yes", "no"]
+
+
+def test_item_cap_splits_batches_and_a_lone_pair_goes_single(graders, monkeypatch):
+    single, batch = graders
+    monkeypatch.setattr(research, "GRADER_BATCH_MAX_ITEMS", 2)
+    items = _items(3)
+
+    assert _grade_with_llm(items) == {"batch_requests": 1, "single_requests": 1, "batch_fallbacks": 0}
+    assert [i["grader"] for i in items] == ["batch", "batch", "single"]
+
+
+def test_batching_off_grades_one_document_per_request(graders, monkeypatch):
+    single, batch = graders
+    monkeypatch.setattr(research, "GRADER_BATCH", False)
+    items = _items(2)
+
+    assert _grade_with_llm(items) == {"batch_requests": 0, "single_requests": 2, "batch_fallbacks": 0}
+    assert batch.requests == []
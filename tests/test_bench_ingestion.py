@@ -0,0 +1,25 @@
+import math
+import random
+
+from eval.bench_ingestion import StubEmbeddings, _synthetic_pages, write_pdf
+from retrival.ingestion import IngestionConfig, _iter_pdf_pages
+
+
+def test_stub_embeddings_are_deterministic_unit_vectors():
+    emb = StubEmbeddings(dim=64)
+    a, b = emb.embed_documents(["heart failure readmission", "hospital outcomes"])
+    assert a == StubEmbeddings(dim=64).embed_query("heart failure readmission")
+    assert math.isclose(sum(v * v for v in a), 1.0, rel_tol=1e-9)
+    assert a != b
+
+
+def test_synthetic_pdf_round_trips_through_the_page_loader(tmp_path):
+    pages = _synthetic_pages(random.Random(3), doc_no=0, n_pages=3, lines_per_page=12)
+    write_pdf(tmp_path / "s.pdf", pages)
+
+    docs = list(_iter_pdf_pages(tmp_path / "s.pdf", IngestionConfig(dataset_dir=tmp_path)))
+    assert [d.metadata["page"] for d in docs] == [0, 1, 2]
+    for doc, lines in zip(docs, pages):
+        assert doc.metadata["total_pages"] == 3
+        assert lines[0] in doc.page_content
+        assert lines[4].split()[0] in doc.page_content
@@ -0,0 +1,41 @@
+from langchain_core.documents import Document
+
+from retrival.chunk_store import ChunkStore, doc_key
+from retrival.lexical_index import LexicalIndex
+
+
+def _record(text, page, chunk):
+    return text, {"doc_id": "a.pdf", "page": page, "chunk_id": chunk, "content_hash": f"h{page}{chunk}"}, None
+
+
+def test_doc_key_matches_ingestion_ids():
+    doc = Document(page_content="x", metadata={"doc_id": "a.pdf", "page": 2, "chunk_id": 5})
+    assert doc_key(doc) == "a.pdf::p2::c5"
+    assert doc_key(Document(page_content="x", metadata={"doc_id": "a.pdf", "chunk_id": 0})) == "a.pdf::p-1::c0"
+    assert doc_key(Document(page_content="x", metadata={"content_hash": "abc"})) == "abc"
+
+
+def test_get_many_reads_through_and_drops_memory_on_resync(tmp_path, make_collection):
+    path = tmp_path / "lexical_index.sqlite"
+    collection = make_collection(
+        {"a.pdf::p0::c0": _record("first text", 0, 0), "a.pdf::p0::c1": _record("second", 0, 1)}
+    )
+    lexical = LexicalIndex(path)
+    lexical.sync(collection)
+    store = ChunkStore(path, max_memory_entries=8)
+
+    got = store.get_many(["a.pdf::p0::c1", "a.pdf::p0::c0", "missing"])
+    assert got["a.pdf::p0::c0"].page_content == "first text"
+    assert got["a.pdf::p0::c1"].id == "a.pdf::p0::c1"
+    store.get_many(["a.pdf::p0::c0"])
+    stats = store.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (2, 1, 1)
+
+    # Re-ingest changes the text behind an id; the store must not serve the cached copy
+    changed = _record("rewritten text", 0, 0)
+    changed[1]["content_hash"] = "new"
+    collection.records["a.pdf::p0::c0"] = changed
+    lexical.sync(collection)
+    assert store.get_many(["a.pdf::p0::c0"])["a.pdf::p0::c0"].page_content == "rewritten text"
+    store.close()
+    lexical.close()
@@ -0,0 +1,54 @@
+import logging
+
+import pytest
+from langchain_core.documents import Document
+
+from graph.utils import chunks
+from graph.utils.chunks import load_documents, to_refs
+from retrival.chunk_store import ChunkStore
+from retrival.lexical_index import LexicalIndex
+
+TEXT = "Readmissions fell by a third. Costs were unchanged. Follow-up ran for a year."
+
+
+@pytest.fixture
+def store(tmp_path, make_collection, monkeypatch):
+    path = tmp_path / "lexical_index.sqlite"
+    lexical = LexicalIndex(path)
+    lexical.sync(make_collection({"a.pdf::p0::c0": (TEXT, {"doc_id": "a.pdf", "page": 0, "chunk_id": 0}, None)}))
+    lexical.close()
+    store = ChunkStore(path)
+    monkeypatch.setattr(chunks, "get_chunk_store", lambda: store)
+    yield store
+    store.close()
+
+
+def test_to_refs_keeps_the_bound_flag():
+    docs = [
+        Document(page_content="x", metadata={"similarity": 0.61, "similarity_bound": False}, id="a::p0::c0"),
+        Document(page_content="y", metadata={"similarity": 0.40, "similarity_bound": True, "matched_query": ["q"]}),
+    ]
+    docs[1].metadata.update({"doc_id": "b.pdf", "page": 1, "chunk_id": 2})
+    assert to_refs(docs) == [
+        {"id": "a::p0::c0", "score": 0.61},
+        {"id": "b.pdf::p1::c2", "score": 0.40, "similarity_bound": True, "matched_query": ["q"]},
+    ]
+
+
+def test_load_documents_applies_spans_and_keeps_positions(store):
+    refs = [
+        {"id": "a.pdf::p0::c0", "score": 0.4, "similarity_bound": True, "spans": [[0, 29]]},
+        {"id": "a.pdf::p0::c0", "score": 0.7},
+    ]
+    first, second = load_documents(refs)
+    assert first.page_content == "Readmissions fell by a third. ..."
+    assert first.metadata["similarity_bound"] is True and first.metadata["similarity"] == 0.4
+    assert second.page_content == TEXT and second.metadata["similarity_bound"] is False
+    assert [d.page_content for d in load_documents(refs, only=[2])] == ["", TEXT]
+
+
+def test_missing_refs_are_logged(store, caplog):
+    with caplog.at_level(logging.WARNING, logger="graph.utils.chunks"):
+        docs = load_documents([{"id": "a.pdf::p0::c0"}, {"id": "gone.pdf::p0::c0"}])
+    assert [d.page_content for d in docs] == [TEXT, ""]
+    assert "1 of 2 chunk refs" in caplog.text and "gone.pdf::p0::c0" in caplog.text
@@ -0,0 +1,38 @@
+from retrival.dedup import MinHasher, NearDupIndex
+
+TEXT = (
+    "Patients discharged within the first week were followed for thirty days, and readmission "
+    "rates were compared across age groups, comorbidity scores and discharge destinations."
+)
+
+
+def test_minhash_is_deterministic_and_tracks_overlap():
+    a, b = MinHasher(), MinHasher()
+    assert (a.signature(TEXT) == b.signature(TEXT)).all()
+    near = TEXT.replace("thirty", "sixty")
+    other = "Quarterly revenue grew on the back of stronger subscription renewals in every region."
+    assert MinHasher.similarity(a.signature(TEXT), a.signature(near)) > 0.5
+    assert MinHasher.similarity(a.signature(TEXT), a.signature(other)) < 0.1
+
+
+def test_find_and_remove_files(tmp_path):
+    index = NearDupIndex(tmp_path / "near_dup.sqlite")
+    index.add("a.pdf::p0::c0", "a.pdf", index.signature(TEXT))
+    index.commit()
+
+    canonical = index.find(index.signature(TEXT.upper()), threshold=0.9)
+    assert canonical == "a.pdf::p0::c0"
+    assert index.find(index.signature("An unrelated sentence about something else entirely."), 0.5) is None
+
+    index.add_duplicate("b.pdf::p3::c1", "b.pdf", canonical, "b.pdf p.4")
+    index.commit()
+    assert index.dependents(["a.pdf"]) == {"b.pdf"}
+    assert index.canonicals_of(["b.pdf"]) == {canonical}
+    assert index.alternates([canonical]) == {canonical: ["b.pdf p.4"]}
+
+    assert index.remove_files(["b.pdf"]) == {canonical}
+    assert index.duplicate_count() == 0
+    index.remove_files(["a.pdf"])
+    assert index.find(index.signature(TEXT), 0.9) is None
+    assert index.indexed_files() == set()
+    index.close()
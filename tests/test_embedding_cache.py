@@ -0,0 +1,90 @@
+import sqlite3
+
+from langchain_core.embeddings import Embeddings
+
+from retrival import embedding_cache, sqlite_cache
+from retrival.embedding_cache import (
+    CachedEmbeddings,
+    CachedQueryEmbeddings,
+    EmbeddingCache,
+    QueryEmbeddingCache,
+    content_hash,
+)
+
+
+class CountingEmbeddings(Embeddings):
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[float(len(t)), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def test_cached_embeddings_only_send_misses(tmp_path):
+    cache = EmbeddingCache(tmp_path / "embedding_cache.sqlite")
+    inner = CountingEmbeddings()
+    emb = CachedEmbeddings(inner, cache, model="m1")
+
+    assert emb.embed_documents(["alpha", "beta", "alpha"]) == [[5.0, 1.0], [4.0, 1.0], [5.0, 1.0]]
+    assert emb.embed_documents(["beta", "gamma"]) == [[4.0, 1.0], [5.0, 1.0]]
+    assert inner.calls == [["alpha", "beta"], ["gamma"]]
+
+    # Vectors are keyed by model: a different embedding model never reuses them
+    CachedEmbeddings(inner, cache, model="m2").embed_documents(["alpha"])
+    assert inner.calls[-1] == ["alpha"]
+    assert cache.get_many("m1", [content_hash("alpha")]) == {content_hash("alpha"): [5.0, 1.0]}
+    cache.close()
+
+
+def test_evict_drops_least_recently_used(tmp_path, monkeypatch):
+    clock = iter(range(100))
+    monkeypatch.setattr(sqlite_cache.time, "time", lambda: float(next(clock)))
+    cache = EmbeddingCache(tmp_path / "embedding_cache.sqlite", max_entries=2)
+    cache.put_many("m", {"a": [1.0]})
+    cache.put_many("m", {"b": [2.0]})
+    cache.put_many("m", {"c": [3.0]})
+    cache.get_many("m", ["a"])
+    assert cache.evict() == 1
+    assert set(cache.get_many("m", ["a", "b", "c"])) == {"a", "c"}
+    cache.close()
+
+
+def test_legacy_composite_key_table_is_migrated(tmp_path):
+    path = tmp_path / "embedding_cache.sqlite"
+    conn = sqlite3.connect(str(path))
+    conn.execute(
+        "CREATE TABLE embeddings (model TEXT NOT NULL, content_hash TEXT NOT NULL, vector BLOB NOT NULL,"
+        " last_used REAL NOT NULL, PRIMARY KEY (model, content_hash)) WITHOUT ROWID"
+    )
+    conn.execute("INSERT INTO embeddings VALUES ('m', 'h1', ?, 1.0)", (embedding_cache._pack([0.5, 2.0]),))
+    conn.commit()
+    conn.close()
+
+    cache = EmbeddingCache(path)
+    assert cache.get_many("m", ["h1"]) == {"h1": [0.5, 2.0]}
+    assert cache.get_many("other", ["h1"]) == {}
+    cache.close()
+
+
+def test_query_embeddings_share_one_entry_per_normalized_query(tmp_path):
+    store = EmbeddingCache(tmp_path / "query_embedding_cache.sqlite")
+    inner = CountingEmbeddings()
+    emb = CachedQueryEmbeddings(inner, QueryEmbeddingCache(store, max_memory_entries=1), model="m")
+
+    first = emb.embed_queries(["What is PRADO-IC?", "  what is   prado-ic ", "Readmission rate"])
+    assert first[0] == first[1]
+    assert inner.calls == [["what is prado-ic", "readmission rate"]]
+
+    # A fresh process (empty LRU) is served from disk; the one-entry LRU serves the repeat
+    cold = QueryEmbeddingCache(store, max_memory_entries=1)
+    emb = CachedQueryEmbeddings(inner, cold, model="m")
+    assert emb.embed_query("WHAT IS PRADO-IC") == first[0]
+    assert emb.embed_query("what is prado-ic?") == first[0]
+    stats = cold.stats()
+    assert (stats["disk_hits"], stats["memory_hits"], stats["misses"]) == (1, 1, 0)
+    assert len(inner.calls) == 1
+    store.close()
@@ -0,0 +1,63 @@
+import pytest
+
+from graph.utils import evidence
+from graph.utils.evidence import count_tokens, render_spans, select_spans, sentence_spans
+
+SENTENCES = [
+    "The cohort enrolled older patients from three hospitals.",
+    "Nurse follow-up calls cut readmission within 30 days.",
+    "Funding came from a regional grant.",
+    "Readmission fell most in patients with two or more nurse visits.",
+    "Staff turnover was not recorded.",
+    "Readmission data came from the national registry.",
+]
+TEXT = " ".join(SENTENCES)
+TERMS = {"nurse", "readmission"}
+
+
+@pytest.fixture(autouse=True)
+def offline_encoding(monkeypatch, encoding):
+    monkeypatch.setattr(evidence, "_encoding", lambda: encoding)
+
+
+def _texts(spans):
+    return [TEXT[a:b] for a, b in spans]
+
+
+def test_sentence_spans_follow_sentence_ends():
+    assert _texts(sentence_spans(TEXT)) == SENTENCES
+
+
+def test_short_or_single_sentence_chunks_are_kept_whole():
+    assert select_spans(TEXT, TERMS, max_sentences=2, max_tokens=count_tokens(TEXT)) is None
+    assert select_spans(SENTENCES[1] * 3, TERMS, max_sentences=2, max_tokens=5) is None
+
+
+def test_best_overlapping_sentences_in_document_order():
+    spans = select_spans(TEXT, TERMS, max_sentences=2, max_tokens=count_tokens(TEXT) - 1)
+    # Both matching terms beat one; the pick is returned in document order
+    assert _texts(spans) == [SENTENCES[1], SENTENCES[3]]
+
+
+def test_sentences_with_no_overlap_are_never_added():
+    spans = select_spans(TEXT, TERMS, max_sentences=6, max_tokens=count_tokens(TEXT) - 1)
+    assert _texts(spans) == [SENTENCES[1], SENTENCES[3], SENTENCES[5]]
+
+
+def test_token_budget_skips_sentences_that_do_not_fit():
+    budget = count_tokens(SENTENCES[1]) + count_tokens(SENTENCES[5])
+    spans = select_spans(TEXT, TERMS, max_sentences=6, max_tokens=budget)
+    assert _texts(spans) == [SENTENCES[1], SENTENCES[5]]
+
+
+def test_no_overlap_keeps_the_opening_sentences():
+    spans = select_spans(TEXT, {"telemonitoring"}, max_sentences=2, max_tokens=count_tokens(TEXT) - 1)
+    assert _texts(spans) == SENTENCES[:2]
+
+
+def test_render_marks_skipped_text():
+    spans = sentence_spans(TEXT)
+    assert render_spans(TEXT, [spans[1], spans[3]]) == f"... {SENTENCES[1]} ... {SENTENCES[3]} ..."
+    assert render_spans(TEXT, [spans[0], spans[1], spans[5]]) == f"{SENTENCES[0]} {SENTENCES[1]} ... {SENTENCES[5]}"
+    assert render_spans(f"  {TEXT}\n", None) == TEXT
+    assert render_spans(TEXT, spans) == " ".join(SENTENCES)
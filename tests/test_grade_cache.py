@@ -0,0 +1,24 @@
+from retrival.grade_cache import GradeCache
+
+
+def test_grades_are_keyed_by_prompt_version_query_and_content(tmp_path):
+    cache = GradeCache(tmp_path / "grade_cache.sqlite")
+    cache.put_many("v1", {("What is PRADO-IC?", "h1"): "yes", ("What is PRADO-IC?", "h2"): "no"})
+
+    got = cache.get_many("v1", [("what is prado-ic", "h1"), ("what is prado-ic", "h2"), ("other", "h1")])
+    assert got == {("what is prado-ic", "h1"): "yes", ("what is prado-ic", "h2"): "no"}
+
+    # A new grader prompt or model is a new version: old verdicts are never matched
+    assert cache.get_many("v2", [("What is PRADO-IC?", "h1")]) == {}
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (2, 2)
+    cache.close()
+
+
+def test_expiry_and_eviction(tmp_path):
+    cache = GradeCache(tmp_path / "grade_cache.sqlite", max_entries=2, ttl_seconds=-1)
+    cache.put_many("v1", {("q", "h1"): "yes", ("q", "h2"): "yes", ("q", "h3"): "no"})
+    assert cache.stats()["evicted"] == 1
+    assert cache.get_many("v1", [("q", "h1"), ("q", "h2"), ("q", "h3")]) == {}
+    assert cache.stats()["entries"] == 0
+    cache.close()
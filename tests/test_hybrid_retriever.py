@@ -0,0 +1,57 @@
+from langchain_core.documents import Document
+
+from retrival.hybrid_retriever import HybridRetriever, _with_similarity
+
+
+def _doc(n, similarity, bound=False):
+    doc = Document(page_content=f"text {n}", metadata={"doc_id": "a.pdf", "page": 0, "chunk_id": n})
+    return _with_similarity(doc, similarity, bound=bound)
+
+
+def _retriever(**kwargs):
+    return HybridRetriever(vectorstore=None, **{"k": 3, "similarity_floor": 0.30, "similarity_cliff": 0.08, **kwargs})
+
+
+def test_select_applies_floor_and_cliff_to_dense_scores():
+    kept, info = _retriever().select([_doc(0, 0.62), _doc(1, 0.58), _doc(2, 0.50), _doc(3, 0.25)])
+    assert [d.metadata["chunk_id"] for d in kept] == [0, 1]
+    assert info["cut_cliff"] == 1 and info["cut_floor"] == 1
+
+
+def test_lexical_only_hits_are_cut_on_their_upper_bound():
+    # A BM25-only hit carries the lowest dense similarity as an upper bound: a bound under the floor
+    # or past the cliff proves the real score is too, but a bound never becomes the best score
+    candidates = [_doc(0, 0.62), _doc(1, 0.58, bound=True), _doc(2, 0.24, bound=True), _doc(3, 0.60)]
+    kept, info = _retriever(k=4).select(candidates)
+    assert [d.metadata["chunk_id"] for d in kept] == [0, 1, 3]
+    assert info["top_similarity"] == 0.62
+    assert info["cut_floor"] == 1
+
+    kept, info = _retriever().select([_doc(0, 0.62), _doc(1, 0.45, bound=True)])
+    assert [d.metadata["chunk_id"] for d in kept] == [0]
+    assert info["cut_cliff"] == 1
+
+    kept, info = _retriever().select([_doc(0, 0.70, bound=True), _doc(1, 0.40, bound=True)])
+    assert len(kept) == 2 and info["top_similarity"] is None
+
+
+def test_dense_mode_over_fetches_before_the_cut():
+    calls = []
+
+    class Backend:
+        embeddings = type("E", (), {"embed_documents": staticmethod(lambda texts: [[1.0] for _ in texts])})()
+
+        def search_by_vectors(self, vectors, k):
+            calls.append(k)
+            return [[(_doc(n, 0.9 - 0.02 * n), 0.9 - 0.02 * n) for n in range(k)] for _ in vectors]
+
+    retriever = HybridRetriever(vectorstore=Backend(), mode="dense", k=2, fetch_k=6, similarity_floor=0.85)
+    kept, info = retriever.retrieve_many_scored(["q"])[0]
+    assert calls == [6]
+    assert info["candidates"] == 6
+    assert [d.metadata["chunk_id"] for d in kept] == [0, 1]
+
+
+def test_select_keeps_unscored_candidates_up_to_k():
+    kept, _ = _retriever().select([_doc(n, None) for n in range(5)])
+    assert len(kept) == 3
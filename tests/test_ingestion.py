@@ -0,0 +1,180 @@
+import random
+
+import chromadb
+import pytest
+
+from eval.bench_ingestion import StubEmbeddings, _synthetic_pages, write_pdf
+from retrival.ingestion import IngestionConfig, _checkpoint_path, ingest
+from retrival.token_splitter import TokenOffsetSplitter
+
+
+@pytest.fixture(autouse=True)
+def offline_encoding(monkeypatch, encoding):
+    monkeypatch.setattr(TokenOffsetSplitter, "encoding", property(lambda self: encoding))
+
+
+def _cfg(tmp_path, **kwargs):
+    defaults = dict(
+        dataset_dir=tmp_path / "data",
+        persist_directory=tmp_path / "chroma",
+        collection_name="test",
+        manifest_path=tmp_path / "manifest.json",
+        incremental=True,
+        chunk_size_tokens=96,
+        chunk_overlap_tokens=8,
+        max_chunk_chars=600,
+        embed_batch_size=4,
+        embed_concurrency=1,
+        embedding_cache_path=None,
+        page_cache_dir=None,
+        near_dup_threshold=None,
+        lexical_index_path=None,
+        vector_index_dir=None,
+        recall_eval_prompts=None,
+    )
+    return IngestionConfig(**{**defaults, **kwargs})
+
+
+def _write(cfg, name, doc_no, n_pages=2):
+    cfg.dataset_dir.mkdir(parents=True, exist_ok=True)
+    pages = _synthetic_pages(random.Random(doc_no), doc_no, n_pages=n_pages, lines_per_page=6)
+    write_pdf(cfg.dataset_dir / name, pages)
+
+
+def _stored_ids(cfg):
+    client = chromadb.PersistentClient(path=str(cfg.persist_directory))
+    return set(client.get_collection(cfg.collection_name).get()["ids"])
+
+
+def _manifest_ids(manifest):
+    return {
+        f"{e['doc_id']}::{k}"
+        for e in manifest["files"].values()
+        for k in e.get("chunks") or {}
+        if k not in (e.get("collapsed") or {})
+    }
+
+
+# Raises on the n-th embedding request, standing in for an API failure mid-run
+class FailingEmbeddings(StubEmbeddings):
+    def __init__(self, fail_on: int):
+        super().__init__()
+        self.fail_on = fail_on
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        if self.calls == self.fail_on:
+            raise RuntimeError("embedding service unavailable")
+        return super().embed_documents(texts)
+
+
+def test_unchanged_files_are_skipped_by_fingerprint(tmp_path):
+    cfg = _cfg(tmp_path)
+    for i in range(3):
+        _write(cfg, f"doc_{i}.pdf", i)
+
+    first = ingest(cfg, embeddings=StubEmbeddings())
+    second = ingest(cfg, embeddings=StubEmbeddings())
+
+    assert first["incremental"]["processed_files"] == 3
+    assert second["incremental"]["reused_previous"] is True
+    assert second["incremental"]["processed_files"] == 0
+    assert second["incremental"]["unchanged_files"] == 3
+    assert second["incremental"]["upserted_chunks"] == 0
+    assert second["collection_version"] == first["collection_version"]
+    assert _stored_ids(cfg) == _manifest_ids(second)
+
+
+def test_stale_and_removed_chunk_ids_are_deleted(tmp_path):
+    cfg = _cfg(tmp_path)
+    for i in range(3):
+        _write(cfg, f"doc_{i}.pdf", i, n_pages=3)
+    first = ingest(cfg, embeddings=StubEmbeddings())
+
+    _write(cfg, "doc_0.pdf", 0, n_pages=1)
+    (cfg.dataset_dir / "doc_1.pdf").unlink()
+    second = ingest(cfg, embeddings=StubEmbeddings())
+
+    removed = {k for k in first["files"] if k.endswith("doc_1.pdf")}
+    shrunk = next(k for k in first["files"] if k.endswith("doc_0.pdf"))
+    stale = set(first["files"][shrunk]["chunks"]) - set(second["files"][shrunk]["chunks"])
+
+    assert stale
+    assert second["incremental"]["processed_files"] == 1
+    assert second["incremental"]["removed_files"] == 1
+    assert not removed & set(second["files"])
+    assert second["incremental"]["deleted_chunks"] == len(_manifest_ids(first) - _manifest_ids(second))
+    assert _stored_ids(cfg) == _manifest_ids(second)
+
+
+def test_chunking_change_rebuilds_every_file(tmp_path):
+    cfg = _cfg(tmp_path)
+    for i in range(2):
+        _write(cfg, f"doc_{i}.pdf", i, n_pages=3)
+    first = ingest(cfg, embeddings=StubEmbeddings())
+
+    cfg = _cfg(tmp_path, chunk_size_tokens=48)
+    second = ingest(cfg, embeddings=StubEmbeddings())
+
+    assert second["incremental"]["reused_previous"] is False
+    assert second["incremental"]["processed_files"] == 2
+    assert second["incremental"]["upserted_chunks"] == second["chunk_count"]
+    assert second["chunk_count"] > first["chunk_count"]
+    assert second["layout"] != first["layout"]
+    assert _stored_ids(cfg) == _manifest_ids(second)
+
+
+def test_interrupted_run_resumes_from_the_checkpoint(tmp_path):
+    cfg = _cfg(tmp_path)
+    for i in range(4):
+        _write(cfg, f"doc_{i}.pdf", i, n_pages=3)
+    clean = ingest(_cfg(tmp_path / "clean", dataset_dir=cfg.dataset_dir), embeddings=StubEmbeddings())
+
+    with pytest.raises(RuntimeError):
+        ingest(cfg, embeddings=FailingEmbeddings(fail_on=clean["throughput"]["embed_batches"] - 1))
+    assert _checkpoint_path(cfg).exists()
+    assert not cfg.manifest_path.exists()
+
+    resumed = ingest(cfg, embeddings=StubEmbeddings())
+
+    assert 0 < resumed["incremental"]["resumed_files"] < 4
+    assert resumed["incremental"]["processed_files"] == 4 - resumed["incremental"]["resumed_files"]
+    assert resumed["incremental"]["upserted_chunks"] < clean["chunk_count"]
+    assert resumed["chunk_count"] == clean["chunk_count"]
+    assert [e["chunks"] for e in resumed["files"].values()] == [e["chunks"] for e in clean["files"].values()]
+    assert _stored_ids(cfg) == _manifest_ids(resumed)
+    assert not _checkpoint_path(cfg).exists()
+
+
+def test_failed_files_stay_in_the_manifest_and_are_retried(tmp_path):
+    cfg = _cfg(tmp_path)
+    _write(cfg, "good.pdf", 0)
+    _write(cfg, "flaky.pdf", 1)
+    (cfg.dataset_dir / "broken.pdf").write_bytes(b"not a pdf")
+    first = ingest(cfg, embeddings=StubEmbeddings())
+    flaky = next(k for k in first["files"] if k.endswith("flaky.pdf"))
+    broken = next(k for k in first["files"] if k.endswith("broken.pdf"))
+
+    assert [f["file"] for f in first["failures"]] == [str(cfg.dataset_dir / "broken.pdf")]
+    assert "error" in first["files"][broken] and not first["files"][broken]["chunks"]
+
+    # A previously indexed file that now fails keeps its chunks; the broken one is retried
+    (cfg.dataset_dir / "flaky.pdf").write_bytes(b"truncated")
+    second = ingest(cfg, embeddings=StubEmbeddings())
+
+    assert second["incremental"]["processed_files"] == 2
+    assert len(second["failures"]) == 2
+    assert second["files"][flaky]["chunks"] == first["files"][flaky]["chunks"]
+    assert "error" in second["files"][flaky]
+    assert second["incremental"]["deleted_chunks"] == 0
+    assert _stored_ids(cfg) == _manifest_ids(first)
+
+    _write(cfg, "flaky.pdf", 1)
+    _write(cfg, "broken.pdf", 2)
+    third = ingest(cfg, embeddings=StubEmbeddings())
+
+    assert third["incremental"]["processed_files"] == 2
+    assert not third["failures"]
+    assert not any("error" in e for e in third["files"].values())
+    assert _stored_ids(cfg) == _manifest_ids(third)
@@ -0,0 +1,58 @@
+from langchain_core.documents import Document
+
+from retrival.embedding_cache import content_hash
+from retrival.hybrid_retriever import reciprocal_rank_fusion
+from retrival.lexical_index import LexicalIndex, tokenize
+
+CHUNKS = {
+    "a.pdf::p0::c0": "The PRADO-IC programme lowered heart failure readmissions.",
+    "a.pdf::p0::c1": "NT-proBNP levels were measured at discharge.",
+    "b.pdf::p1::c0": "Telemonitoring did not change mortality in the heart failure cohort.",
+    "b.pdf::p1::c1": "Quarterly revenue grew in every region.",
+}
+
+
+def _collection(make_collection, chunks):
+    return make_collection(
+        {
+            cid: (text, {"doc_id": cid.split("::")[0], "content_hash": content_hash(text)}, None)
+            for cid, text in chunks.items()
+        }
+    )
+
+
+def _doc(cid):
+    doc_id, page, chunk = cid.split("::")
+    return Document(page_content=cid, metadata={"doc_id": doc_id, "page": int(page[1:]), "chunk_id": int(chunk[1:])})
+
+
+def test_tokenize_keeps_compounds_and_drops_stopwords():
+    assert tokenize("What is the NT-proBNP of PRADO-IC?") == ["nt-probnp", "nt", "probnp", "prado-ic", "prado", "ic"]
+
+
+def test_search_ranks_exact_terms_and_follows_sync(tmp_path, make_collection):
+    collection = _collection(make_collection, CHUNKS)
+    index = LexicalIndex(tmp_path / "lexical_index.sqlite")
+    assert index.sync(collection) == {"path": str(index.path), "indexed": 4, "removed": 0, "total": 4}
+
+    hits = index.search("PRADO-IC readmissions", k=2)
+    assert hits[0][0].id == "a.pdf::p0::c0"
+    assert hits[0][0].page_content == CHUNKS["a.pdf::p0::c0"]
+    assert [d.id for d, _ in index.search("heart failure", k=5)] == ["a.pdf::p0::c0", "b.pdf::p1::c0"]
+    assert index.search("the of and", k=3) == []
+
+    # Removed and rewritten chunks are picked up by the next sync
+    chunks = {k: v for k, v in CHUNKS.items() if k != "a.pdf::p0::c0"}
+    chunks["b.pdf::p1::c1"] = "PRADO-IC enrolment closed early."
+    assert index.sync(_collection(make_collection, chunks))["removed"] == 1
+    assert [d.id for d, _ in index.search("PRADO-IC", k=3)] == ["b.pdf::p1::c1"]
+    assert index.sync(_collection(make_collection, chunks))["indexed"] == 0
+    index.close()
+
+
+def test_reciprocal_rank_fusion_rewards_agreement():
+    dense = [_doc("a.pdf::p0::c0"), _doc("a.pdf::p0::c1"), _doc("b.pdf::p1::c0")]
+    lexical = [_doc("b.pdf::p1::c0"), _doc("b.pdf::p1::c1")]
+    fused = reciprocal_rank_fusion([dense, lexical], k=3)
+    # Equal scores keep the order of the first ranking that listed them
+    assert [d.page_content for d in fused] == ["b.pdf::p1::c0", "a.pdf::p0::c0", "a.pdf::p0::c1"]
@@ -0,0 +1,31 @@
+import random
+
+from eval.bench_ingestion import _synthetic_pages, write_pdf
+from retrival.ingestion import IngestionConfig, _iter_prepared
+
+
+def _summary(jobs, cfg):
+    return [
+        (pdf.name, [d.page_content for d in prepared.docs], prepared.error is not None)
+        for pdf, prepared in _iter_prepared(jobs, cfg)
+    ]
+
+
+def test_process_pool_matches_the_serial_path(tmp_path):
+    rng = random.Random(5)
+    jobs = []
+    for i in range(5):
+        path = tmp_path / f"doc_{i}.pdf"
+        if i == 2:
+            path.write_bytes(b"not a pdf")
+        else:
+            write_pdf(path, _synthetic_pages(rng, i, n_pages=3, lines_per_page=8))
+        jobs.append((path, None))
+
+    serial = _summary(jobs, IngestionConfig(dataset_dir=tmp_path, extraction_workers=1))
+    parallel = _summary(jobs, IngestionConfig(dataset_dir=tmp_path, extraction_workers=3))
+
+    assert parallel == serial
+    assert [name for name, _, _ in serial] == [f"doc_{i}.pdf" for i in range(5)]
+    assert [failed for _, _, failed in serial] == [False, False, True, False, False]
+    assert all(pages for name, pages, failed in serial if not failed)
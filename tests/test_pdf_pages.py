@@ -0,0 +1,56 @@
+import pytest
+
+from eval.bench_ingestion import write_pdf
+from retrival import ingestion
+from retrival.ingestion import IngestionConfig, _iter_pdf_pages
+
+TEXT = ["Readmission rates were compared across discharge destinations and age groups."] * 3
+
+
+def _extractors(path, **kwargs):
+    cfg = IngestionConfig(dataset_dir=path.parent, **kwargs)
+    return [d.metadata["extractor"] for d in _iter_pdf_pages(path, cfg)]
+
+
+@pytest.fixture
+def pdf(tmp_path):
+    def build(pages):
+        path = tmp_path / "doc.pdf"
+        write_pdf(path, pages)
+        return path
+
+    return build
+
+
+def test_text_pdf_stays_on_pymupdf(pdf):
+    assert _extractors(pdf([TEXT, TEXT, TEXT])) == ["pymupdf"] * 3
+
+
+def test_blank_probe_pages_switch_primary_extractor(pdf):
+    path = pdf([[], [], TEXT, TEXT])
+    assert _extractors(path, extractor_probe_pages=2)[2:] == ["pdfplumber", "pdfplumber"]
+    assert _extractors(path, extractor_probe_pages=0)[2:] == ["pymupdf", "pymupdf"]
+
+
+def test_short_page_falls_back_per_page(pdf, monkeypatch):
+    original = ingestion._PyMuPDFPages.text
+    monkeypatch.setattr(ingestion._PyMuPDFPages, "text", lambda self, i: "" if i == 1 else original(self, i))
+    assert _extractors(pdf([TEXT, TEXT, TEXT])) == ["pymupdf", "pdfplumber", "pymupdf"]
+
+
+def test_prepared_pages_drop_repeated_edges_and_keep_timing_out_of_metadata(pdf, tmp_path):
+    header = "Journal of Synthetic Cardiology - Volume 1"
+    body = [f"Line {n} of the results section on discharge follow-up." for n in range(8)]
+    path = pdf([[header, f"Page {p} body text about readmissions.", *body, "CC-BY 4.0 footer"] for p in range(4)])
+    cfg = IngestionConfig(dataset_dir=tmp_path)
+
+    first = ingestion._prepare_file(path, cfg)
+    assert first.error is None and len(first.docs) == 4
+    for p, doc in enumerate(first.docs):
+        assert header not in doc.page_content and "footer" not in doc.page_content
+        assert f"Page {p} body text" in doc.page_content
+        assert "extract_ms" not in doc.metadata
+    assert first.extractors["pymupdf"]["pages"] == 4
+
+    # Re-preparing the same file gives identical metadata, so the lexical index has nothing to retokenize
+    assert [d.metadata for d in ingestion._prepare_file(path, cfg).docs] == [d.metadata for d in first.docs]
@@ -0,0 +1,37 @@
+from retrival.plan_cache import PlanCache
+
+TASKS = ["PRADO-IC programme outcomes", "PRADO-IC eligibility criteria"]
+
+
+def test_plans_are_keyed_by_prompt_version_and_normalized_question(tmp_path):
+    cache = PlanCache(tmp_path / "plan_cache.sqlite")
+    cache.put("v1", "What is PRADO-IC?", TASKS)
+    assert cache.get("v1", "  what is prado-ic ") == TASKS
+    # Any planner prompt or model change is a new version
+    assert cache.get("v2", "What is PRADO-IC?") is None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+    cache.close()
+
+
+def test_nearest_respects_version_and_threshold(tmp_path):
+    cache = PlanCache(tmp_path / "plan_cache.sqlite")
+    cache.put("v1", "What is PRADO-IC?", TASKS, vector=[1.0, 0.0, 0.0])
+    cache.put("v1", "Quarterly revenue?", ["revenue"], vector=[0.0, 1.0, 0.0])
+
+    tasks, similarity, question = cache.nearest("v1", [0.9, 0.1, 0.0], min_similarity=0.9)
+    assert tasks == TASKS and question == "what is prado-ic" and similarity > 0.99
+    assert cache.nearest("v1", [0.6, 0.6, 0.5], min_similarity=0.9) is None
+    assert cache.nearest("v2", [1.0, 0.0, 0.0], min_similarity=0.5) is None
+    # Written after the matrix was built, still found
+    cache.put("v1", "Sleep apnoea?", ["apnoea"], vector=[0.0, 0.0, 1.0])
+    assert cache.nearest("v1", [0.0, 0.1, 1.0], min_similarity=0.9)[0] == ["apnoea"]
+    cache.close()
+
+
+def test_expired_plans_are_not_served(tmp_path):
+    cache = PlanCache(tmp_path / "plan_cache.sqlite", ttl_seconds=-1)
+    cache.put("v1", "What is PRADO-IC?", TASKS, vector=[1.0, 0.0])
+    assert cache.get("v1", "What is PRADO-IC?") is None
+    assert cache.nearest("v1", [1.0, 0.0], min_similarity=0.5) is None
+    cache.close()
@@ -0,0 +1,86 @@
+from langchain_core.documents import Document
+
+from graph.agents import AGENT_Research as research
+from graph.agents.AGENT_Research import _merge_candidates, research_agent
+from retrival.grade_cache import GradeCache
+
+
+def _doc(id, text, similarity=None, bound=False, **md):
+    if similarity is not None:
+        md["similarity"] = similarity
+    if bound:
+        md["similarity_bound"] = True
+    return Document(page_content=text, metadata=md, id=id)
+
+
+def test_same_chunk_from_two_queries_is_kept_once_with_the_best_score():
+    items, empty, duplicates = _merge_candidates(
+        ["q1", "q2"],
+        [[_doc("a", "alpha", 0.41), _doc("b", "beta", 0.50)], [_doc("a", "alpha", 0.62)]],
+    )
+    assert (empty, duplicates) == (0, 1)
+    assert [i["doc"].id for i in items] == ["a", "b"]
+    first = items[0]
+    assert (first["query"], first["queries"], first["doc"].metadata["similarity"]) == ("q2", ["q1", "q2"], 0.62)
+
+
+def test_exact_similarity_outranks_an_upper_bound_and_ties_keep_the_first_query():
+    items, _, _ = _merge_candidates(
+        ["q1", "q2", "q3"],
+        [[_doc("a", "alpha", 0.70, bound=True)], [_doc("a", "alpha", 0.55)], [_doc("a", "alpha", 0.55)]],
+    )
+    assert len(items) == 1
+    assert (items[0]["query"], items[0]["doc"].metadata.get("similarity_bound")) == ("q2", None)
+    assert items[0]["queries"] == ["q1", "q2", "q3"]
+
+
+def test_chunks_merge_on_content_hash_across_ids_and_empty_chunks_are_counted():
+    items, empty, duplicates = _merge_candidates(
+        ["q1", "q2", "q1"],
+        [
+            [_doc("a", "alpha", 0.3, content_hash="h"), _doc("e", "   ")],
+            [_doc("z", "alpha again", 0.4, content_hash="h")],
+            [_doc("a", "alpha", 0.2, content_hash="h")],
+        ],
+    )
+    assert (len(items), empty, duplicates) == (1, 1, 2)
+    assert items[0]["doc"].id == "z" and items[0]["queries"] == ["q1", "q2"]
+
+
+class FakeRetriever:
+    def __init__(self, results):
+        self.results = results
+
+    def retrieve_many_scored(self, queries):
+        return [(self.results[q], {"returned": len(self.results[q])}) for q in queries]
+
+
+def test_research_agent_grades_a_shared_chunk_once_and_records_every_query(monkeypatch, tmp_path):
+    results = {
+        "PRADO-IC outcomes": [_doc("a", "PRADO-IC cut readmissions.", 0.48), _doc("b", "Unrelated.", 0.31)],
+        "PRADO-IC readmissions": [_doc("a", "PRADO-IC cut readmissions.", 0.66)],
+    }
+    graded = []
+
+    def local_grade(question, text, similarity, thresholds, similarity_bound=False):
+        graded.append((question, text, similarity))
+        return ("yes" if "PRADO" in text else "no"), {"coverage": None, "similarity": similarity}
+
+    monkeypatch.setattr(research, "get_retriever", lambda: FakeRetriever(results))
+    monkeypatch.setattr(research, "local_grade", local_grade)
+    monkeypatch.setattr(research, "_grade_cache", lambda: GradeCache(tmp_path / "grade_cache.sqlite"))
+    for name in ("query_embedding_cache_stats", "retrieval_cache_stats", "chunk_store_stats"):
+        monkeypatch.setattr(research, name, lambda: None)
+
+    out = research_agent(list(results))
+
+    assert graded == [
+        ("PRADO-IC readmissions", "PRADO-IC cut readmissions.", 0.66),
+        ("PRADO-IC outcomes", "Unrelated.", 0.31),
+    ]
+    [kept] = out["documents"]
+    assert kept.metadata["matched_query"] == ["PRADO-IC outcomes", "PRADO-IC readmissions"]
+    assert kept.metadata["similarity"] == 0.66
+    assert (out["trace"]["kept"], out["trace"]["dropped"], out["trace"]["merged_duplicates"]) == (1, 1, 1)
+    assert out["trace"]["rows"][0]["query"] == "PRADO-IC readmissions"
+    assert [r["returned"] for r in out["trace"]["retrieval"]] == [2, 1]
@@ -0,0 +1,47 @@
+import json
+import os
+
+from langchain_core.documents import Document
+
+from retrival.result_cache import RetrievalResultCache
+
+DOCS = [Document(page_content="chunk text", metadata={"doc_id": "a.pdf", "similarity": 0.61}, id="a.pdf::p0::c0")]
+
+
+def _write_manifest(path, version, stamp):
+    path.write_text(json.dumps({"collection_version": version}), encoding="utf-8")
+    os.utime(path, ns=(stamp, stamp))
+
+
+def test_results_follow_the_collection_version(tmp_path):
+    manifest = tmp_path / "ingestion_manifest.json"
+    cache = RetrievalResultCache(tmp_path / "result_cache.sqlite", manifest)
+
+    # No manifest yet: nothing is cached
+    cache.put_many("hybrid:k=3", {"q": DOCS})
+    assert cache.get_many("hybrid:k=3", ["q"]) == {}
+
+    _write_manifest(manifest, "v1", 1_000_000_000)
+    cache.put_many("hybrid:k=3", {"What is PRADO-IC?": DOCS})
+    got = cache.get_many("hybrid:k=3", ["what is prado-ic", "other"])
+    assert list(got) == ["what is prado-ic"]
+    assert got["what is prado-ic"][0].id == "a.pdf::p0::c0"
+    assert got["what is prado-ic"][0].metadata == DOCS[0].metadata
+    assert cache.get_many("dense:k=3", ["What is PRADO-IC?"]) == {}
+
+    # Re-ingest writes a new collection_version; older entries are dropped, not just skipped
+    _write_manifest(manifest, "v2", 2_000_000_000)
+    assert cache.get_many("hybrid:k=3", ["What is PRADO-IC?"]) == {}
+    assert cache.stats()["invalidated"] == 1
+    assert cache.stats()["entries"] == 0
+    cache.close()
+
+
+def test_expired_entries_are_dropped(tmp_path):
+    manifest = tmp_path / "ingestion_manifest.json"
+    _write_manifest(manifest, "v1", 1_000_000_000)
+    cache = RetrievalResultCache(tmp_path / "result_cache.sqlite", manifest, ttl_seconds=-1)
+    cache.put_many("p", {"q": DOCS})
+    assert cache.get_many("p", ["q"]) == {}
+    assert cache.stats()["expired"] == 1
+    cache.close()
@@ -0,0 +1,52 @@
+import pytest
+
+from retrival.token_splitter import TokenOffsetSplitter
+
+PAGE = (
+    "Readmission within 30 days was the primary outcome.\n\n"
+    "Patients aged ≥65 years (n = 1 204) had higher rates — 18.2% versus 11.7% — than younger "
+    "patients. Café staff and naïve controls were excluded. 🩺 Follow-up calls reduced readmissions.\n"
+    "Limitations: a single centre, retrospective design and missing discharge summaries for some wards. "
+) * 6
+
+
+def _splitter(encoding, **kwargs):
+    splitter = TokenOffsetSplitter(**{"chunk_size": 120, "chunk_overlap": 20, "max_chars": 300, **kwargs})
+    splitter._enc = encoding
+    return splitter
+
+
+def test_token_offsets_round_trip_to_page_text(encoding):
+    splitter = _splitter(encoding)
+    offsets = splitter._token_offsets(PAGE)
+    assert offsets[0] == 0 and offsets[-1] == len(PAGE)
+    assert offsets == sorted(offsets)
+    # Same convention as tiktoken: a token starting mid-char (the emoji, ≥) maps to that char
+    text, expected = encoding.decode_with_offsets(encoding.encode(PAGE))
+    assert text == PAGE
+    assert offsets[:-1] == expected
+
+
+def test_chunks_are_page_slices_within_both_limits(encoding):
+    splitter = _splitter(encoding)
+    chunks = splitter.split_text(PAGE)
+    assert len(chunks) > 1
+
+    pos = 0
+    for chunk in chunks:
+        found = PAGE.find(chunk, max(0, pos - 300))
+        assert found != -1
+        assert len(chunk) <= splitter.max_chars
+        assert len(encoding.encode(chunk)) <= splitter.chunk_size
+        pos = found + len(chunk)
+    assert pos >= len(PAGE.rstrip())
+    # Overlap never starts a chunk mid-word
+    assert all(PAGE[PAGE.find(c) - 1].isspace() or PAGE.find(c) == 0 for c in chunks)
+
+
+def test_char_limit_and_blank_input(encoding):
+    splitter = _splitter(encoding, chunk_size=400, chunk_overlap=10, max_chars=80)
+    assert all(len(c) <= 80 for c in splitter.split_text(PAGE))
+    assert splitter.split_text("  \n ") == []
+    with pytest.raises(ValueError):
+        TokenOffsetSplitter(chunk_size=10, chunk_overlap=10, max_chars=100)
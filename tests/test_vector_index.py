@@ -0,0 +1,59 @@
+import numpy as np
+import pytest
+
+from retrival.vector_index import NumpyVectorIndex, write_vector_index
+
+
+@pytest.fixture(scope="module")
+def data(make_collection):
+    rng = np.random.default_rng(7)
+    # 30 clusters of 10 so the exact top-5 is well separated from the rest
+    centroids = rng.standard_normal((30, 64)).astype(np.float32)
+    vectors = (np.repeat(centroids, 10, axis=0) + 0.5 * rng.standard_normal((300, 64))).astype(np.float32)
+    queries = vectors[:20] + 0.05 * rng.standard_normal((20, 64)).astype(np.float32)
+    collection = make_collection(
+        {f"doc::p0::c{i}": (f"chunk {i}", {"row": i}, v.tolist()) for i, v in enumerate(vectors)}
+    )
+    return collection, vectors, queries
+
+
+def _exact_ids(vectors, queries, k):
+    v = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    q = queries / np.linalg.norm(queries, axis=1, keepdims=True)
+    return [set(np.argsort(-(v @ qi))[:k]) for qi in q]
+
+
+def _search(tmp_path, collection, queries, k, **kwargs):
+    directory = tmp_path / "vectors"
+    write_vector_index(collection, directory, batch_size=64, **kwargs)
+    index = NumpyVectorIndex(directory)
+    try:
+        return index.search_by_vectors(queries.tolist(), k)
+    finally:
+        index.close()
+
+
+@pytest.mark.parametrize("quantization", ["binary", "int8", "float16"])
+@pytest.mark.parametrize("rescore", [False, True])
+def test_quantized_top_k_matches_exact_search(tmp_path, data, quantization, rescore):
+    collection, vectors, queries = data
+    k = 5
+    hits = _search(tmp_path, collection, queries, k, quantization=quantization, rescore=rescore)
+    exact = _exact_ids(vectors, queries, k)
+
+    recall = np.mean([len({d.metadata["row"] for d, _ in h} & e) / k for h, e in zip(hits, exact)])
+    assert recall >= (0.5 if quantization == "binary" and not rescore else 0.95)
+    for i, h in enumerate(hits):
+        assert h[0][0].metadata["row"] == i
+        assert all(-1.0 <= s <= 1.0 + 1e-3 for _, s in h)
+        assert [s for _, s in h] == sorted((s for _, s in h), reverse=True)
+
+
+def test_binary_scores_are_signed_hamming(tmp_path, data):
+    collection, vectors, _ = data
+    hits = _search(tmp_path, collection, -vectors[:1], 300, quantization="binary", rescore=False)[0]
+    scores = [s for _, s in hits]
+    # The exact opposite of a stored vector flips every bit: the lowest possible score, not a wrapped huge one
+    assert hits[-1][0].metadata["row"] == 0
+    assert scores[-1] == -1.0
+    assert max(scores) <= 1.0